@@ -1,15 +1,53 @@
-import os
 import csv
 
+import config
+from partitions import FIELDS, pad_departure
+from storage import get_storage
+from csvfile import read_csv
+from worktime import worked_minutes, count_worked_time, ATTENDANCE_COLUMNS
+
+
+# Name of the attendance file. Now it's the name of all attendance data, which we keep in the storage,
+# but read_from_file() and write_to_file() still accept it.
+ATTENDANCE_FILE = 'attendance.csv'
+
+
+class ArrivedAlreadyError(ValueError):
+    """
+    The exception is raised when we mark the arrival of an employee who has come today and hasn't left yet.
+    """
+
+    def __init__(self, employee_id):
+        self.employee_id = employee_id
+        super().__init__('The employee {} has arrived already.'.format(employee_id))
+
+
+class GoneAlreadyError(ValueError):
+    """
+    The exception is raised when we mark the departure of an employee who isn't at work: his attendance is closed
+    already or he hasn't come.
+    """
+
+    def __init__(self, employee_id, attendance_id=None):
+        self.employee_id = employee_id
+        self.attendance_id = attendance_id
+        if employee_id is None:
+            super().__init__('The attendance {} is closed already.'.format(attendance_id))
+        else:
+            super().__init__('The employee {} has gone already.'.format(employee_id))
+
 
 # First we create a class which contains description, attributes and methods for attendance checking.
 class Attendance:
 
     def __init__(self):
         """
-        Create an instance of the class and initialise ids list.
+        Create an instance of the class and initialise the last attendance id and the map of open attendances:
+        {employee id: (attendance id, arrival date, arrival time)} for those employees who have come and haven't left
+        yet.
         """
-        self.ids = []
+        self.last_id = 0
+        self.open_sessions = {}
         self.attendance_id = 0
         self.employee_id = 0
         self.first_name = ''
@@ -33,14 +71,9 @@ class Attendance:
         This method add line of data with arrival id, employee's id, his first and last name, arrival's date and time.
         Departure date and time are stayed 'None'. They'll be changed late.
         """
-        # If the system is new, we initiate ids list.
-        if len(self.ids) == 0:
-            self.ids.append(1)
-        else:  # Otherwise we continue to count from the last number in id's list.
-            index = self.ids[-1]
-            new_index = index + 1
-            self.ids.append(new_index)
-        self.attendance_id = self.ids[-1]
+        # We continue to count from the last attendance id. If the system is new, we start from 1.
+        self.last_id += 1
+        self.attendance_id = self.last_id
 
         # And add all necessary data to the instance.
         self.employee_id = employee_id
@@ -49,6 +82,12 @@ class Attendance:
         self.arrival_date = arrival_date
         self.arrival_time = arrival_time
 
+    def open_session(self, employee_id):
+        """
+        Method returns attendance id, arrival date and time of the employee who is at work now, or None if he isn't.
+        """
+        return self.open_sessions.get(str(employee_id))
+
     def add_departure(self, departure_date, departure_time):
         """
         Method sets departure date and time to the instance.
@@ -67,10 +106,10 @@ def read_from_file(file_name):
     :param file_name: file with data we want to read
     :return: data from the file
     """
-    with open(file_name, 'r', newline='') as file:  # Open a csv file
-        reader = csv.DictReader(file, delimiter=';', dialect='excel')  # like a csv-dictionary
-        data = [row for row in reader]  # and convert it to the list of dictionaries,
-    return data  # each row contains pairs {name of the column: a piece of data}
+    if file_name == ATTENDANCE_FILE:  # All attendance is in the storage.
+        return list(get_storage().read_attendance())
+    # Read it like a csv-dictionary, skipping spaces which pad departure of open attendances.
+    return read_csv(file_name, skipinitialspace=True)  # each row contains pairs {name of the column: a piece of data}
 
 
 def write_to_file(file_name, data, header=0, massive=0):
@@ -82,55 +121,199 @@ def write_to_file(file_name, data, header=0, massive=0):
     :param massive:
     :return: the function doesn't return anything, it just write data to the file.
     """
+    if file_name == ATTENDANCE_FILE:  # All attendance goes to the storage.
+        get_storage().append_attendance([data] if massive == 0 else data)
+        return
     with open(file_name, 'a', newline='') as file:  # Open file to write data
-        # Define a header.
-        fields = ['attendance id', 'employee id', 'first name', 'last name', 'arrival date', 'arrival time',
-                  'departure date', 'departure time']
-        writer = csv.DictWriter(file, fieldnames=fields, delimiter=';', dialect='excel')  # and configure parameters
+        writer = csv.DictWriter(file, fieldnames=FIELDS, delimiter=';', dialect='excel')  # and configure parameters
         if header == 1:  # If we write new data to the file,
             writer.writeheader()  # first we need to write the header.
         if massive == 0:  # If we pass only one line of data,
-            writer.writerow(dict(zip(fields, data)))  # we construct only one dictionary {header: data}.
+            writer.writerow(dict(zip(FIELDS, pad_departure(data))))  # we construct only one dictionary {header: data}.
         else:  # Else if we send several number of lines with data (about some employees),
             for row in data:  # for each line
-                input_string = dict(zip(fields, row))  # we construct its own dictionary
+                input_string = dict(zip(FIELDS, pad_departure(row)))  # we construct its own dictionary
                 writer.writerow(input_string)  # and write it into the file
 
 
+def read_attendance(start=None, end=None):
+    """
+    The function returns attendance with arrival between given dates (datetime.date, both included).
+    Csv storage reads only partitions of months which have these dates.
+    """
+    return list(get_storage().read_attendance(start, end))
+
+
+def load_attendance_state():
+    """
+    The function restores the last attendance id and open attendances when the program starts. Usually it takes them
+    from the storage. If the storage doesn't know them (e.g. csv storage lost its small files or attendance data
+    has been changed after them), it reads all attendance once and writes them down again.
+    """
+    get_storage().prepare()
+    read_attendance_state()
+
+
+def read_attendance_state():
+    """
+    The function reads the last attendance id and open attendances from the storage or rebuilds them.
+    """
+    storage = get_storage()
+    next_id = storage.get_next_id('attendance')
+    sessions = storage.load_open_sessions()
+    if next_id is not None and sessions is not None:
+        attendance.last_id = next_id - 1
+        attendance.open_sessions = sessions
+    else:
+        rebuild_attendance_state()
+
+
+def refresh_attendance_state():
+    """
+    If several programs use the same storage (config.SHARED), others may have added arrivals and departures since
+    we read the last attendance id and open attendances. So the function reads them again. We call it before we check
+    an employee and inside every transaction which changes attendance.
+    """
+    if config.SHARED:
+        read_attendance_state()
+
+
+def rebuild_attendance_state():
+    """
+    The function reads the attendance file and finds the last attendance id and all employees who have come
+    and haven't left yet.
+    """
+    last_id = 0
+    sessions = {}
+    columns = ['attendance id', 'employee id', 'arrival date', 'arrival time', 'departure date']
+    rows = get_storage().iter_attendance(columns)
+    for attendance_id, employee_id, arrival_date, arrival_time, departure_date in rows:
+        last_id = max(last_id, int(attendance_id))
+        if departure_date == 'None':
+            sessions[employee_id] = (int(attendance_id), arrival_date, arrival_time)
+    attendance.last_id = last_id
+    attendance.open_sessions = sessions
+    save_attendance_state()
+
+
+def save_attendance_state():
+    """
+    The function writes down open attendances and the next attendance id. We call it after every change
+    of the attendance file.
+    """
+    storage = get_storage()
+    storage.save_open_sessions(attendance.open_sessions)
+    storage.set_next_id('attendance', attendance.last_id + 1)
+
+
 def add_arrival_to_system(employee_id, first_name, last_name, arrival_date, arrival_time):
     """
     The method add arrival to the system and write it to attendance file.
+    If the employee has come on this date and hasn't left yet, it raises ArrivedAlreadyError and writes nothing.
+    If he has come on an earlier date and hasn't left, his forgotten attendance is closed first.
     """
-    # First we construct new attendance instance and add data to it.
-    # The method add arrival id to the instance automatically.
-    attendance.add_arrival(employee_id, first_name, last_name, arrival_date, arrival_time)
+    storage = get_storage()
+    with storage.transaction():  # Nobody else gives attendance ids or marks the employee until we finish.
+        # Another kiosk may have marked him, so we check the latest open attendances.
+        refresh_attendance_state()
+        session = attendance.open_session(employee_id)
+        if session is not None and session[1] == arrival_date:
+            raise ArrivedAlreadyError(employee_id)
+        forgotten = close_forgotten_session(employee_id, arrival_date)
+        if forgotten is not None:
+            storage.set_departure(forgotten[0], forgotten[1], forgotten[2])
+            storage.add_worked_time([(str(employee_id), forgotten[1], 0, 1)])
 
-    #  Then we receive data back with the attendance instance we've just create.
-    data = attendance.get_attendance()
-    # and call the function to write received data to the attendance.csv file.
-    if os.path.isfile('attendance.csv'):
-        write_to_file('attendance.csv', data)
-    else:
-        write_to_file('attendance.csv', data, header=1)
+        # First we construct new attendance instance and add data to it.
+        # The method add arrival id to the instance automatically.
+        attendance.add_arrival(employee_id, first_name, last_name, arrival_date, arrival_time)
 
+        #  Then we receive data back with the attendance instance we've just create.
+        data = attendance.get_attendance()
+        # and call the function to write received data to the storage.
+        storage.append_attendance([data])
 
-def add_departure_to_system(attendance_id, departure_date, departure_time):
+        # Now the employee is at work.
+        attendance.open_sessions[str(employee_id)] = (attendance.attendance_id, arrival_date, arrival_time)
+        save_attendance_state()
+
+
+def add_departure_to_system(attendance_id, departure_date, departure_time, employee_id=None):
     """
     This method adds departure information to the given attendance.
+    If we know the employee, we pass his id too, so we don't need to look for him among open attendances. If we don't
+    know the attendance (attendance_id is None), the open attendance of the employee is closed.
+    If the attendance is closed already, it raises GoneAlreadyError and writes nothing.
+    """
+    storage = get_storage()
+    with storage.transaction():  # Nobody else closes the attendance until we finish.
+        refresh_attendance_state()
+        if attendance_id is None:
+            session = attendance.open_session(employee_id)
+            if session is None:
+                raise GoneAlreadyError(employee_id)
+            attendance_id = session[0]
+        employee_id, session = close_session(attendance_id, employee_id)
+        if session is None:
+            raise GoneAlreadyError(employee_id, attendance_id)
+
+        # Write departure to the storage and remember, that the employee has gone.
+        storage.set_departure(attendance_id, departure_date, departure_time)
+        save_attendance_state()
+
+        # Add the closed attendance to worked time of its day.
+        arrival_date, arrival_time = session[1:3]
+        minutes = worked_minutes(arrival_date, arrival_time, departure_date, departure_time)
+        storage.add_worked_time([(employee_id, arrival_date, minutes, 1)])
+
+
+def close_forgotten_session(employee_id, arrival_date):
+    """
+    The function is called before a new arrival of the employee. If he is at work since an earlier date, he has
+    forgotten to mark his departure. We don't know when he left, so his attendance is closed at its arrival and adds
+    no worked time. The function removes it from the map of open attendances, the caller writes its departure.
+    :return: the closed attendance (attendance id, arrival date, arrival time) or None, if there is no such one
+    """
+    session = attendance.open_session(employee_id)
+    if session is None or session[1] >= arrival_date:
+        return None
+    return attendance.open_sessions.pop(str(employee_id))
+
+
+def close_session(attendance_id, employee_id=None):
+    """
+    The function removes the given attendance from the map of open attendances.
+    :return: the employee id and the removed open attendance, or None instead of it, if the attendance wasn't open
+    """
+    if employee_id is None:  # Find the employee, whose attendance it is.
+        for key, session in attendance.open_sessions.items():
+            if session[0] == int(attendance_id):
+                employee_id = key
+                break
+    session = attendance.open_sessions.get(str(employee_id))
+    if session is not None and session[0] == int(attendance_id):
+        return str(employee_id), attendance.open_sessions.pop(str(employee_id))
+    return employee_id, None
+
+
+def rebuild_worked_time():
+    """
+    The function counts worked time of all employees from attendance data again.
+    :return: the number of days in the table
+    """
+    storage = get_storage()
+    with storage.transaction():
+        entries = count_worked_time(storage.iter_attendance(ATTENDANCE_COLUMNS))
+        storage.replace_worked_time(entries)
+    return len(entries)
+
+
+def worked_time(employee_id, start=None, end=None):
+    """
+    The function returns worked time of the employee between given dates (datetime.date, both included):
+    {date: (minutes, sessions)}. It doesn't read attendance, only the table of worked time.
     """
-    # First we find the line we need to add departure in attendance.csv file
-    data = read_from_file('attendance.csv')
-    row_to_change = [row for row in data if row['attendance id'] == str(attendance_id)]
-    # Add necessary information
-    row_to_change[0]['departure date'] = departure_date
-    row_to_change[0]['departure time'] = departure_time
-    new_data = [[value for value in item.values()] for item in data]
-    # And write it to the temp file
-    write_to_file('attendance-temp.csv', new_data, header=1, massive=1)
-
-    # Then remove previous file and rename temp file as attendance.csv
-    os.remove('attendance.csv', )  # We remove previous file
-    os.rename('attendance-temp.csv', 'attendance.csv')  # and rename temp file as it used to be.
+    return get_storage().read_worked_time(employee_id, start, end)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,187 @@
+"""
+This module measures how long the main operations of the system take on data of different sizes.
+
+For every size tier it makes synthetic data in a new directory (see generate.py) and starts a new program there, which
+times the operations:
+- start: the first start moves attendance.csv to the storage (SQLite storage copies csv files first) and counts
+  worked time, the next one reads what the storage keeps;
+- arrivals and departures, one by one as the GUI and kiosks mark them;
+- adding employees from a file and deleting them by a file of ids;
+- counting worked time of all attendance again;
+- reports: employees with a status, attendance with statuses, late arrivals, attendance of one week, worked time
+  of one employee.
+Results are printed and written to a JSON file.
+
+To run the benchmark:
+    python benchmark.py [tier ...] [--output file]
+Tiers are small, medium and large (small and medium if none are given). The storage is chosen as usual
+(EAMS_STORAGE environment variable).
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import datetime
+import multiprocessing
+
+from generate import generate, FIRST_DAY
+
+
+# Size tiers: (employees, days).
+TIERS = {
+    'small': (100, 30),
+    'medium': (1000, 90),
+    'large': (5000, 250),
+}
+DEFAULT_TIERS = ['small', 'medium']
+# Arrivals, departures, added and deleted employees in every tier (fewer, if there are fewer employees).
+OPERATIONS = 200
+OUTPUT_FILE = 'benchmark_results.json'
+
+
+def measure(results, name, function, count=1):
+    """
+    The function calls function() once, keeps how long it took and returns its result.
+    :param results: the dictionary of results of the tier
+    :param name: the name of the operation
+    :param count: how many operations function() makes
+    """
+    started = time.perf_counter()
+    value = function()
+    seconds = time.perf_counter() - started
+    results[name] = {'count': count, 'seconds': round(seconds, 6), 'ms per operation': round(seconds * 1000 / count, 4),
+                     'operations per second': round(count / seconds, 1) if seconds else None}
+    return value
+
+
+def run_tier(directory, employees_count, days):
+    """
+    The function times the operations in the given data directory. It's called in a new program.
+    :return: a dictionary {operation: its result}
+    """
+    # Programs modules read settings and keep data when they are imported, so we import them only here.
+    os.chdir(directory)
+    from employee import registry, load_employees, add_from_file, delete_from_file
+    from attendance import (attendance, load_attendance_state, read_attendance_state, add_arrival_to_system,
+                            add_departure_to_system, rebuild_worked_time, worked_time)
+    from storage import get_storage, migrate_to_sqlite
+    from query import Query
+    import config
+
+    results = {}
+    # Generated files are csv files, the database gets them as it gets data of csv storage.
+    if config.STORAGE == 'sqlite':
+        measure(results, 'migrate_to_sqlite', migrate_to_sqlite)
+    storage = get_storage()
+
+    def start():
+        load_employees()
+        load_attendance_state()
+
+    measure(results, 'first start', start)
+    measure(results, 'start', lambda: (load_employees(), read_attendance_state()))
+
+    # Arrivals and departures on the day after the data.
+    count = min(OPERATIONS, len(registry))
+    chosen = sorted(registry, key=lambda record: record.id)[:count]
+    date = (FIRST_DAY + datetime.timedelta(days=days)).isoformat()
+
+    def arrivals():
+        for employee in chosen:
+            add_arrival_to_system(employee.id, employee.first_name, employee.last_name, date, '09:00')
+        storage.flush()
+
+    def departures():
+        for employee in chosen:
+            session = attendance.open_session(employee.id)
+            add_departure_to_system(session[0], date, '18:00', employee.id)
+        storage.flush()
+
+    measure(results, 'add_arrival_to_system', arrivals, count)
+    measure(results, 'add_departure_to_system', departures, count)
+
+    # Employees from files.
+    with open('new_employees.csv', 'w') as file:
+        file.write('first name;last name;status;phone;age\n')
+        file.writelines('New;Employee;junior;0500000000;30\n' for _ in range(count))
+    first_id = max(record.id for record in registry) + 1
+    with open('delete_employees.csv', 'w') as file:
+        file.writelines('{}\n'.format(first_id + number) for number in range(count))
+    measure(results, 'add_from_file', lambda: add_from_file('new_employees.csv'), count)
+    measure(results, 'delete_from_file', lambda: delete_from_file('delete_employees.csv'), count)
+
+    # The first start has counted worked time already, we time counting it again.
+    measure(results, 'rebuild_worked_time', rebuild_worked_time)
+
+    # Reports. Every one reads data again, the cache of reports isn't used.
+    last_week = FIRST_DAY + datetime.timedelta(days=max(days - 7, 0))
+    end = FIRST_DAY + datetime.timedelta(days=days - 1)
+    reports = {
+        'report: employees with status': lambda: Query(statuses=['middle']).employees(),
+        'report: attendance with statuses': lambda: list(Query(statuses=['senior', 'middle']).attendance()),
+        'report: late arrivals': lambda: list(Query(statuses=registry.statuses(), late=True).attendance()),
+        'report: attendance of the last week': lambda: list(Query(start=last_week, end=end).attendance()),
+        'report: worked time of one employee': lambda: worked_time(chosen[0].id),
+    }
+    for name, report in reports.items():
+        result = measure(results, name, report)
+        results[name]['rows'] = len(result)
+
+    results['attendance rows'] = sum(1 for _ in storage.iter_attendance(['attendance id']))
+    return results
+
+
+def run(tiers=DEFAULT_TIERS, output=OUTPUT_FILE):
+    """
+    The function runs the benchmark for the given tiers, prints results and writes them to the JSON file.
+    :return: the dictionary of results
+    """
+    import config
+
+    results = {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+               'platform': platform.platform(), 'storage': config.STORAGE, 'write policy': config.WRITE_POLICY,
+               'tiers': {}}
+    # Every tier is measured in a new program, as it is in real life.
+    context = multiprocessing.get_context('spawn')
+    for tier in tiers:
+        employees_count, days = TIERS[tier]
+        directory = tempfile.mkdtemp(prefix='attendance-benchmark-')
+        try:
+            started = time.perf_counter()
+            employees_count, attendance_count = generate(directory, employees_count, days)
+            generation = time.perf_counter() - started
+            with context.Pool(1) as pool:
+                operations = pool.apply(run_tier, (directory, employees_count, days))
+        finally:
+            shutil.rmtree(directory)
+
+        results['tiers'][tier] = {'employees': employees_count, 'days': days, 'attendances': attendance_count,
+                                  'generation seconds': round(generation, 3), 'operations': operations}
+        print('{}: {} employees, {} days, {} attendances'.format(tier, employees_count, days, attendance_count))
+        for name, result in operations.items():
+            if isinstance(result, dict):
+                print('    {:<40} {:>8} x {:>10.3f} ms'.format(name, result['count'], result['ms per operation']))
+
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print('Results are written to {}.'.format(output))
+    return results
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    output = OUTPUT_FILE
+    if '--output' in arguments:
+        position = arguments.index('--output')
+        output = arguments[position + 1] if position + 1 < len(arguments) else OUTPUT_FILE
+        del arguments[position:position + 2]
+    unknown = [tier for tier in arguments if tier not in TIERS]
+    if unknown:
+        print('Usage: python benchmark.py [tier ...] [--output file]\n'
+              'Tiers: {}'.format(', '.join(TIERS)))
+        sys.exit(1)
+    run(arguments or DEFAULT_TIERS, output)
@@ -0,0 +1,85 @@
+"""
+This module keeps results of reports, so showing the same report again doesn't read and filter data again.
+
+Every result is kept together with the version of data it was built from (see Storage.data_version()). The version
+changes every time somebody changes employees or attendance, so an old result is never shown: it's thrown away and
+built again. The cache keeps only the last used results (config.REPORT_CACHE_SIZE of them).
+"""
+
+import threading
+from collections import OrderedDict
+
+import config
+from storage import get_storage
+
+
+class LRUCache:
+    """
+    A bounded cache of results: {key: (version of data, result)}. When it's full, the least recently used result
+    is thrown away.
+    """
+
+    def __init__(self, size=32):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()  # reports may be built in other threads
+        self.counters = {'hits': 0, 'misses': 0, 'invalidated': 0, 'evicted': 0}
+
+    def get(self, key, version, build):
+        """
+        Method returns the result for the key built from data of the given version. If there is no such result,
+        it builds it with the function build() and keeps it.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[1]
+            self.counters['misses'] += 1
+            if entry is not None:  # Data has been changed since we built it.
+                del self.entries[key]
+                self.counters['invalidated'] += 1
+
+        result = build()
+
+        with self.lock:
+            self.entries[key] = (version, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.counters['evicted'] += 1
+        return result
+
+    def clear(self):
+        """
+        Method throws away all results.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Method returns numbers of hits, misses, invalidated and evicted results, the number of kept results
+        and the share of hits.
+        """
+        with self.lock:
+            result = dict(self.counters)
+            result['kept'] = len(self.entries)
+        requests = result['hits'] + result['misses']
+        result['hit rate'] = result['hits'] / requests if requests else 0.0
+        return result
+
+
+# The cache of reports of the program.
+report_cache = LRUCache(config.REPORT_CACHE_SIZE)
+
+
+def cached_report(key, build):
+    """
+    The function returns the result of the report with the given key (e.g. kind of the report, statuses and whether
+    we need only late employees) for the current data. The function build() makes the result if it isn't kept yet.
+    """
+    storage = get_storage()
+    storage.flush()  # Collected rows have to be in the version we check, because the report will read them.
+    return report_cache.get(key, storage.data_version(), build)
@@ -0,0 +1,222 @@
+"""
+This module keeps a copy of attendance in a columnar binary format for reports over long periods.
+
+Every column is a separate .npy file in the columns directory:
+- attendance_id, employee_id - int32;
+- arrival_day, departure_day - int32, days since 1970-01-01;
+- arrival_minute, departure_minute - int16, minutes since midnight.
+- name_id - int32, the line of names.csv with first and last name of the employee at the time of the attendance.
+Departure of an open attendance is OPEN (-1) in both departure columns. Every name which an employee had is kept once
+in names.csv, so the copy is converted back to the usual csv layout with the same names.
+
+Columns are loaded through numpy.memmap, so a report reads from disk only the columns it really uses.
+
+To convert attendance of the system to columns and back run:
+    python columnar.py from-csv [attendance file]
+    python columnar.py to-csv <attendance file>
+"""
+
+import os
+import csv
+import sys
+import shutil
+import datetime
+
+import numpy as np
+
+from dates import read_date
+from storage import get_storage, ATTENDANCE_FIELDS
+
+
+COLUMN_DIR = 'attendance_columns'
+NAMES_FILE = 'names.csv'
+ATTENDANCE_FILE = 'attendance.csv'  # the name of all attendance data of the system
+
+COLUMNS = {
+    'attendance_id': np.int32,
+    'employee_id': np.int32,
+    'arrival_day': np.int32,
+    'arrival_minute': np.int16,
+    'departure_day': np.int32,
+    'departure_minute': np.int16,
+    'name_id': np.int32,
+}
+OPEN = -1  # departure of an employee who hasn't left yet
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def to_day(text):
+    """
+    The function converts a date 'YYYY-MM-DD' (or 'dd/mm/YYYY' of older files) to the number of days since 1970-01-01,
+    'None' to OPEN.
+    """
+    if text == 'None':
+        return OPEN
+    return (read_date(text) - EPOCH).days
+
+
+def from_day(day):
+    """
+    The function converts the number of days since 1970-01-01 back to a date 'YYYY-MM-DD', OPEN to 'None'.
+    """
+    if day == OPEN:
+        return 'None'
+    return (EPOCH + datetime.timedelta(days=int(day))).isoformat()
+
+
+def to_minute(text):
+    """
+    The function converts a time 'HH:MM' to the number of minutes since midnight, 'None' to OPEN.
+    """
+    if text == 'None':
+        return OPEN
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def from_minute(minute):
+    """
+    The function converts the number of minutes since midnight back to a time 'HH:MM', OPEN to 'None'.
+    """
+    if minute == OPEN:
+        return 'None'
+    return '{:02d}:{:02d}'.format(int(minute) // 60, int(minute) % 60)
+
+
+def column_path(name, directory=COLUMN_DIR):
+    """
+    The function returns the path of the column file.
+    """
+    return os.path.join(directory, name + '.npy')
+
+
+def iter_source(file_name):
+    """
+    The function yields attendance rows from the given csv file. The name of the attendance file of the system means
+    all attendance in the storage.
+    """
+    if file_name == ATTENDANCE_FILE:
+        storage = get_storage()
+        storage.prepare()  # Data of older versions is moved to the storage on the first start.
+        yield from storage.read_attendance()
+        return
+    with open(file_name, 'r', newline='') as file:
+        yield from csv.DictReader(file, delimiter=';', dialect='excel', skipinitialspace=True)
+
+
+def write_portion(files, values):
+    """
+    The function appends collected values of every column to its raw file and empties the lists of values.
+    """
+    for name, dtype in COLUMNS.items():
+        np.array(values[name], dtype=dtype).tofile(files[name])
+        values[name].clear()
+
+
+def write_column(name, count, directory):
+    """
+    The function turns the raw file of the column into a .npy file of count values. The data is copied in blocks,
+    so the whole column is never in memory.
+    """
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(COLUMNS[name])), 'fortran_order': False,
+              'shape': (count,)}
+    raw_path = column_path(name, directory) + '.raw'
+    with open(raw_path, 'rb') as raw, open(column_path(name, directory), 'wb') as file:
+        np.lib.format.write_array_header_1_0(file, header)
+        shutil.copyfileobj(raw, file)
+    os.remove(raw_path)
+
+
+def from_csv(file_name=ATTENDANCE_FILE, directory=COLUMN_DIR, portion=10000):
+    """
+    The function converts attendance from the csv file to columns. Rows are converted and written in portions,
+    so only one portion of every column is in memory.
+    :param file_name: attendance file in the usual csv layout
+    :param directory: directory for column files
+    :param portion: number of rows we convert at once
+    :return: the number of converted rows
+    """
+    os.makedirs(directory, exist_ok=True)
+    values = {name: [] for name in COLUMNS}
+    names = {}  # {(employee id, first name, last name): name id}
+    count = 0
+    files = {name: open(column_path(name, directory) + '.raw', 'wb') for name in COLUMNS}
+    try:
+        for row in iter_source(file_name):
+            name = (row['employee id'], row['first name'], row['last name'])
+            values['attendance_id'].append(int(row['attendance id']))
+            values['employee_id'].append(int(row['employee id']))
+            values['arrival_day'].append(to_day(row['arrival date']))
+            values['arrival_minute'].append(to_minute(row['arrival time']))
+            values['departure_day'].append(to_day(row['departure date']))
+            values['departure_minute'].append(to_minute(row['departure time']))
+            values['name_id'].append(names.setdefault(name, len(names)))
+            count += 1
+            if count % portion == 0:
+                write_portion(files, values)
+        write_portion(files, values)
+    finally:
+        for file in files.values():
+            file.close()
+
+    for name in COLUMNS:
+        write_column(name, count, directory)
+
+    with open(os.path.join(directory, NAMES_FILE), 'w', newline='') as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(['name id', 'employee id', 'first name', 'last name'])
+        for (employee_id, first_name, last_name), name_id in names.items():
+            writer.writerow([name_id, employee_id, first_name, last_name])
+
+    return count
+
+
+def load(columns=None, directory=COLUMN_DIR):
+    """
+    The function maps the given columns into memory. Nothing is read from disk until a report uses the data.
+    :param columns: names of the columns we need, all columns if None
+    :param directory: directory with column files
+    :return: a dictionary {name of the column: numpy.memmap}
+    """
+    if columns is None:
+        columns = list(COLUMNS)
+    return {name: np.load(column_path(name, directory), mmap_mode='r') for name in columns}
+
+
+def to_csv(file_name, directory=COLUMN_DIR, portion=10000):
+    """
+    The function converts columns back to the usual csv layout of attendance.
+    :param file_name: attendance file to write
+    :param directory: directory with column files
+    :param portion: number of rows we convert at once
+    :return: the number of converted rows
+    """
+    with open(os.path.join(directory, NAMES_FILE), 'r', newline='') as file:
+        names = {int(row['name id']): (row['first name'], row['last name'])
+                 for row in csv.DictReader(file, delimiter=';', dialect='excel')}
+
+    data = load(directory=directory)
+    count = len(data['attendance_id'])
+    with open(file_name, 'w', newline='') as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(ATTENDANCE_FIELDS)
+        for start in range(0, count, portion):
+            part = {name: column[start:start + portion].tolist() for name, column in data.items()}
+            for i in range(len(part['attendance_id'])):
+                first_name, last_name = names.get(part['name_id'][i], ('', ''))
+                writer.writerow([part['attendance_id'][i], part['employee_id'][i], first_name, last_name,
+                                 from_day(part['arrival_day'][i]), from_minute(part['arrival_minute'][i]),
+                                 from_day(part['departure_day'][i]), from_minute(part['departure_minute'][i])])
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'from-csv':
+        source = sys.argv[2] if len(sys.argv) > 2 else ATTENDANCE_FILE
+        print('{} attendances are converted to {}.'.format(from_csv(source), COLUMN_DIR))
+    elif len(sys.argv) == 3 and sys.argv[1] == 'to-csv':
+        print('{} attendances are converted to {}.'.format(to_csv(sys.argv[2]), sys.argv[2]))
+    else:
+        print('Usage: python columnar.py from-csv [attendance file]\n'
+              '       python columnar.py to-csv <attendance file>')
@@ -0,0 +1,50 @@
+"""
+Settings of the system.
+"""
+
+import os
+
+
+# Where the system keeps its data:
+# 'csv' - employees.csv and monthly attendance files next to the program,
+# 'sqlite' - one SQLite database file.
+# We can also choose it with EAMS_STORAGE environment variable.
+STORAGE = os.environ.get('EAMS_STORAGE', 'csv')
+
+# The database file for 'sqlite' storage.
+SQLITE_FILE = os.environ.get('EAMS_SQLITE_FILE', 'attendance.db')
+
+# How arrivals are written to the storage:
+# 'event' - every arrival is written and synced to the disk at once,
+# 'batch' - arrivals are collected and written together, the storage syncs every batch to the disk,
+# 'os' - arrivals are collected and written together, the operating system decides when they reach the disk.
+# 'batch' and 'os' are quicker in a morning rush, but if the program or the computer crashes, arrivals which aren't
+# written yet are lost: up to BATCH_SIZE of them, at most BATCH_SECONDS old, and with 'os' also those the operating
+# system hasn't put on the disk. So 'event' is the default, choose another policy only if you accept this.
+# We can also choose it with EAMS_WRITE_POLICY environment variable.
+WRITE_POLICY = os.environ.get('EAMS_WRITE_POLICY', 'event')
+
+# Collected arrivals are written when there are so many of them or when the oldest of them waits so many seconds.
+BATCH_SIZE = int(os.environ.get('EAMS_BATCH_SIZE', 50))
+BATCH_SECONDS = float(os.environ.get('EAMS_BATCH_SECONDS', 1.0))
+
+# Set it to True (EAMS_SHARED=1), if several programs (e.g. kiosks) use the same data at once. Then every program
+# reads the latest state of the data before it changes it and writes every change before other programs go on.
+SHARED = os.environ.get('EAMS_SHARED', '0') == '1'
+
+# The check-in service (service.py): its address and how often it writes collected check-ins to the storage.
+SERVICE_HOST = os.environ.get('EAMS_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.environ.get('EAMS_SERVICE_PORT', 8080))
+SERVICE_FLUSH_SECONDS = float(os.environ.get('EAMS_SERVICE_FLUSH_SECONDS', 0.5))
+# The biggest body of a request to the service in bytes, check-ins are much smaller.
+SERVICE_MAX_BODY = int(os.environ.get('EAMS_SERVICE_MAX_BODY', 64 * 1024))
+
+# Reports: an employee is late if he comes after this time. Statuses may have their own time, e.g. {'boss': '10:00'}.
+LATE_AFTER = os.environ.get('EAMS_LATE_AFTER', '09:30')
+LATE_AFTER_BY_STATUS = {}
+
+# How many results of reports the program keeps, so the same report is shown again without reading data.
+REPORT_CACHE_SIZE = int(os.environ.get('EAMS_REPORT_CACHE_SIZE', 32))
+
+# Reports are built in background threads, so the program answers meanwhile. How many reports may be built at once.
+REPORT_WORKERS = int(os.environ.get('EAMS_REPORT_WORKERS', 2))
@@ -0,0 +1,79 @@
+"""
+This module helps us read and write csv files of the system: semicolon separated, excel dialect, a header in the
+first line.
+
+iter_rows() reads a file row by row and keeps in memory only one row at a time, so other functions can filter even
+very big files without building lists of all rows.
+"""
+
+import csv
+from operator import itemgetter
+
+
+def read_header(file_name, **parameters):
+    """
+    The function returns names of the columns of the file or an empty list, if the file is empty.
+    """
+    with open(file_name, 'r', newline='') as file:
+        reader = csv.reader(file, delimiter=';', dialect='excel', **parameters)
+        return next(reader, [])
+
+
+def iter_rows(file_name, columns=None, predicate=None, **parameters):
+    """
+    The generator reads the file row by row and yields tuples with values of the given columns only.
+    :param file_name: file with data we want to read
+    :param columns: names of the columns we need in this order, all columns if None
+    :param predicate: a function which takes a tuple of values and says whether we need this row
+    :param parameters: additional parameters of the csv reader
+    """
+    with open(file_name, 'r', newline='') as file:
+        reader = csv.reader(file, delimiter=';', dialect='excel', **parameters)
+        header = next(reader, None)
+        if header is None:  # The file is empty.
+            return
+        if columns is None:
+            columns = header
+        pick = column_picker(header, columns)
+        for row in reader:
+            if not row:
+                continue
+            values = pick(row)
+            if predicate is None or predicate(values):
+                yield values
+
+
+def column_picker(header, columns):
+    """
+    The function returns a function which takes a row of the file with the given header and returns a tuple
+    with values of the given columns.
+    """
+    indexes = [header.index(column) for column in columns]
+    # itemgetter picks values quicker than a loop, but with one index it returns a value instead of a tuple.
+    return itemgetter(*indexes) if len(indexes) > 1 else lambda row: (row[indexes[0]],)
+
+
+def read_csv(file_name, **parameters):
+    """
+    The function reads data from a csv file of the system.
+    :param file_name: file with data we want to read
+    :param parameters: additional parameters of the csv reader
+    :return: a list of dictionaries, each row contains pairs {name of the column: a piece of data}
+    """
+    header = read_header(file_name, **parameters)
+    return [dict(zip(header, values)) for values in iter_rows(file_name, **parameters)]
+
+
+def write_csv(file_name, fields, rows, header=False):
+    """
+    The function appends rows to a csv file of the system.
+    :param file_name: file to write data into it
+    :param fields: names of the columns
+    :param rows: a list of lists with data
+    :param header: defines whether we need to write to the file also a header or not
+    """
+    with open(file_name, 'a', newline='') as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        if header:
+            writer.writerow(fields)
+        writer.writerows(rows)
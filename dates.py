@@ -0,0 +1,73 @@
+"""
+This module describes how the system writes dates and times.
+
+Data files and the database keep dates as 'YYYY-MM-DD' (ISO 8601) and times as 'HH:MM'. Such strings sort in the same
+order as dates and times themselves, so we compare them and search by them without parsing. A date has the same
+width as the old 'dd/mm/YYYY', so the place reserved for departure of an open attendance doesn't change.
+
+Dates are converted only at the boundaries of the system: what user types or sees, swipe logs and command line
+arguments still use 'dd/mm/YYYY' (ISO dates are accepted there too).
+
+Data of older versions with 'dd/mm/YYYY' dates is converted once by:
+    python storage.py migrate-dates
+"""
+
+import datetime
+
+
+DATE_FORMAT = '%Y-%m-%d'  # dates in data files and the database
+USER_DATE_FORMAT = '%d/%m/%Y'  # dates which user types and sees, and dates of older versions
+TIME_FORMAT = '%H:%M'
+MISSING = 'None'  # departure of an employee who hasn't left yet
+
+
+def parse_date(text):
+    """
+    The function converts a date from data files to datetime.date.
+    """
+    return datetime.date.fromisoformat(text)
+
+
+def read_date(text):
+    """
+    The function converts a date which comes from outside ('dd/mm/YYYY' or 'YYYY-MM-DD') to datetime.date.
+    It raises ValueError, if the text isn't a date.
+    """
+    text = text.strip()
+    if '/' in text:
+        return datetime.datetime.strptime(text, USER_DATE_FORMAT).date()
+    return datetime.date.fromisoformat(text)
+
+
+def to_iso(text):
+    """
+    The function converts a date which comes from outside to the date for data files. 'None' stays 'None'.
+    """
+    if text.strip() == MISSING:
+        return MISSING
+    return read_date(text).isoformat()
+
+
+def to_user(text):
+    """
+    The function converts a date from data files to the date user sees: '2020-02-04' -> '04/02/2020'.
+    'None' stays 'None'.
+    """
+    if len(text) != 10 or text[4] != '-':
+        return text
+    return text[8:10] + '/' + text[5:7] + '/' + text[:4]
+
+
+def now():
+    """
+    The function returns the current date and time for data files, e.g. ('2026-10-18', '09:05').
+    """
+    moment = datetime.datetime.today()
+    return moment.strftime(DATE_FORMAT), moment.strftime(TIME_FORMAT)
+
+
+def is_old_date(text):
+    """
+    The function says whether the date from data files is written as in older versions ('dd/mm/YYYY').
+    """
+    return '/' in text
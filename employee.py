@@ -11,6 +11,37 @@ delete several number of employees together using csv file with id-numbers of em
 # So we start by importing some necessary modules.
 import os
 import csv
+from collections import namedtuple
+
+import config
+from storage import get_storage, EMPLOYEES_FILE, EMPLOYEE_FIELDS
+from csvfile import read_csv, write_csv
+from search import PrefixIndex
+
+
+class UnknownEmployeesError(ValueError):
+    """
+    The exception is raised when user wants to delete employees who aren't in the system. It keeps all their ids,
+    so we can show them to user at once.
+    """
+
+    def __init__(self, ids):
+        self.ids = ids
+        super().__init__('There are no employees with ids {} in the system.'.format(', '.join(str(i) for i in ids)))
+
+
+class InvalidRowsError(ValueError):
+    """
+    The exception is raised when some rows of the file with new employees are wrong. It keeps all of them as a list
+    of tuples (line number, what is wrong), so user can fix the whole file at once.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = ['line {}: {}'.format(line, message) for line, message in errors[:10]]
+        if len(errors) > 10:
+            lines.append('and {} more.'.format(len(errors) - 10))
+        super().__init__('{} rows of the file are wrong:\n'.format(len(errors)) + '\n'.join(lines))
 
 
 # And we create a class which contains description, attributes and methods useful for our purpose.
@@ -18,11 +49,11 @@ class Employee:
 
     def __init__(self):
         """
-        This function creates an instance of our class and initialize a list which contains employees' id numbers.
+        This function creates an instance of our class and initialize the last employee's id number.
         It doesn't take any argument because we want to create new employees two different ways: manually
         and from file.
         """
-        self.ids = []  # a list of ids
+        self.last_id = 0  # the id number of the last employee who was added to the system
         self.employee_id = 0
         self.first_name = ''
         self.last_name = ''
@@ -36,13 +67,8 @@ class Employee:
         phone number and age. Id number adds automatically depending on the last existing employee's number
         in the system.
         """
-        if len(self.ids) == 0:  # If there are no employees yet in the system, we start to count from 1.
-            self.ids.append(1)
-        else:  # Otherwise
-            index = self.ids[-1]  # we takes the last id number from the list which contains all id numbers (ids),
-            new_index = index + 1  # add 1 to it,
-            self.ids.append(new_index)  # append to the id list,
-        self.employee_id = self.ids[-1]  # and associate to a new employee's id number.
+        self.last_id += 1  # If there are no employees yet in the system, we start to count from 1.
+        self.employee_id = self.last_id  # and associate to a new employee's id number.
 
         # Also we associate another data from input to the attributes of an employee.
         self.first_name = first_name
@@ -54,18 +80,16 @@ class Employee:
     def delete(self, id_number):
         """
         Delete method helps us delete an employee from the system. It takes one argument: employee's id and deletes it
-        from the list of ids and returns an index of the deleted number. Later we'll be able to find an employee in our
-        employee's csv file by this index and delete all the information about him.
+        from the registry of employees and returns his record. If there is no such employee, it raises ValueError.
         """
-        point = self.ids.index(id_number)  # This instruction returns an index of the employee to delete.
-        del self.ids[point]  # Now we delete employee's id from the list of all ids
-        return point  # and returns an index of the id number to calling function to delete related data from the file.
+        return registry.delete(id_number)
 
-    def get_index(self, id_number):
+    def delete_many(self, id_numbers):
         """
-        This method just returns the position of a required employee from the list of ids.
+        This method deletes several employees from the registry at once. It takes a set of ids. If some of the ids
+        aren't in the system, it deletes nobody and raises UnknownEmployeesError with all of them.
         """
-        return self.ids.index(id_number)
+        registry.delete_many(id_numbers)
 
     def get_employee(self):
         """
@@ -79,16 +103,199 @@ class Employee:
 person = Employee()
 
 
+# One employee in the registry. A named tuple is small and can't be changed by accident.
+EmployeeRecord = namedtuple('EmployeeRecord', ['id', 'first_name', 'last_name', 'status', 'phone', 'age'])
+
+
+class Registry:
+    """
+    The registry keeps all employees of the system in memory, so we can find, add or delete an employee by his id
+    without reading employees' file again. It also keeps ids of employees of every status, so we find employees
+    with given statuses without looking at everybody.
+    """
+
+    def __init__(self):
+        """
+        Create an empty registry: {employee's id: EmployeeRecord}, the index {status: set of employees' ids} and
+        the index of beginnings of names and ids for the search (see search.py).
+        """
+        self.employees = {}
+        self.by_status = {}
+        self.index = PrefixIndex(())
+
+    def load(self, rows):
+        """
+        Method fills the registry with employees from the given rows (lists of values in the order of columns).
+        """
+        self.employees = {}
+        self.by_status = {}
+        self.index = PrefixIndex(())
+        self.add_many(rows)
+
+    def add(self, employee_id, first_name, last_name, status, phone, age):
+        """
+        Method adds an employee to the registry and returns his record.
+        """
+        return self.add_many([(employee_id, first_name, last_name, status, phone, age)])[0]
+
+    def add_many(self, rows):
+        """
+        Method adds employees from the given rows (lists of values in the order of columns) and returns their records.
+        The search index is changed once for all of them.
+        """
+        records = []
+        old_records = []
+        for employee_id, first_name, last_name, status, phone, age in rows:
+            record = EmployeeRecord(int(employee_id), first_name, last_name, status, str(phone), str(age))
+            old = self.employees.get(record.id)
+            if old is not None:  # The employee is changed, so he may have another status and name now.
+                self.unindex(old)
+                old_records.append(old)
+            self.employees[record.id] = record
+            self.by_status.setdefault(record.status, set()).add(record.id)
+            records.append(record)
+        self.index.remove(old_records)
+        self.index.add({record.id: record for record in records}.values())  # The last record of every id.
+        return records
+
+    def unindex(self, record):
+        """
+        Method removes the employee from the index of statuses. A status without employees is removed too.
+        """
+        ids = self.by_status[record.status]
+        ids.discard(record.id)
+        if not ids:
+            del self.by_status[record.status]
+
+    def get(self, id_number):
+        """
+        Method returns the record of the employee with the given id or None, if there is no such employee.
+        """
+        return self.employees.get(int(id_number))
+
+    def delete(self, id_number):
+        """
+        Method deletes the employee with the given id and returns his record. If there is no such employee,
+        it raises ValueError.
+        """
+        try:
+            record = self.employees.pop(int(id_number))
+        except KeyError:
+            raise ValueError('There is no employee with number {} in the system.'.format(id_number))
+        self.unindex(record)
+        self.index.remove([record])
+        return record
+
+    def delete_many(self, id_numbers):
+        """
+        Method deletes all employees with the given ids. It checks all of them first, and if some ids aren't in the
+        system, it deletes nobody and raises UnknownEmployeesError with all of them.
+        """
+        unknown = [i for i in id_numbers if i not in self.employees]
+        if unknown:
+            raise UnknownEmployeesError(sorted(unknown))
+        records = [self.employees.pop(i) for i in id_numbers]
+        for record in records:
+            self.unindex(record)
+        self.index.remove(records)
+
+    def statuses(self):
+        """
+        Method returns a sorted list of statuses of employees.
+        """
+        return sorted(self.by_status)
+
+    def has_status(self, status):
+        """
+        Method says whether there is an employee with the given status.
+        """
+        return status in self.by_status
+
+    def ids_with_statuses(self, statuses):
+        """
+        Method returns a set of ids of employees with given statuses.
+        """
+        ids = set()
+        for status in statuses:
+            ids |= self.by_status.get(status, set())
+        return ids
+
+    def with_statuses(self, statuses):
+        """
+        Method returns records of employees with given statuses sorted by id.
+        """
+        return [self.employees[i] for i in sorted(self.ids_with_statuses(statuses))]
+
+    def last_id(self):
+        """
+        Method returns the biggest id in the registry or 0, if it's empty.
+        """
+        return max(self.employees, default=0)
+
+    def snapshot(self):
+        """
+        Method returns a copy of the registry, which nobody changes. Reports read it in other threads while the program
+        adds and deletes employees. Records can't be changed, so the copy shares them with the registry.
+        """
+        copy = Registry()
+        copy.employees = dict(self.employees)
+        copy.by_status = {status: set(ids) for status, ids in self.by_status.items()}
+        copy.index = None  # Reports don't search employees by names.
+        return copy
+
+    def rows(self):
+        """
+        Method returns all employees as lists of values in the order of columns of employees' file.
+        """
+        return [list(record) for record in self.employees.values()]
+
+    def __contains__(self, id_number):
+        return int(id_number) in self.employees
+
+    def __iter__(self):
+        return iter(self.employees.values())
+
+    def __len__(self):
+        return len(self.employees)
+
+
+# And the registry with all employees of the system.
+registry = Registry()
+
+
+def load_employees():
+    """
+    The function loads all employees to the registry and finds the last employee's id number when the program starts.
+    We take it from the metadata file, because the last employees may have been deleted already. If the metadata is
+    lost or out of date, we count from the biggest id in the file.
+    """
+    storage = get_storage()
+    registry.load(storage.load_employees())
+    next_id = storage.get_next_id('employees')
+    if next_id is None:
+        next_id = registry.last_id() + 1
+        storage.set_next_id('employees', next_id)
+    person.last_id = next_id - 1
+
+
+def refresh_employees():
+    """
+    If several programs use the same storage (config.SHARED), others may have added or deleted employees since we
+    loaded them. So the function loads them again. We call it inside every transaction which changes employees.
+    """
+    if config.SHARED:
+        load_employees()
+
+
 def read_from_file(file_name):
     """
     The function helps us read data from a given file.
     :param file_name: file with data we want to read
     :return: data from the file
     """
-    with open(file_name, 'r', newline='') as file:  # Open a csv file
-        reader = csv.DictReader(file, delimiter=';', dialect='excel')  # like a csv-dictionary
-        data = [row for row in reader]  # and convert it to the list of dictionaries,
-    return data  # each row contains pairs {name of the column: a piece of data}
+    if file_name == EMPLOYEES_FILE:  # Employees of the system are in the storage.
+        return [dict(zip(EMPLOYEE_FIELDS, row)) for row in get_storage().load_employees()]
+    return read_csv(file_name)  # each row contains pairs {name of the column: a piece of data}
 
 
 def write_to_file(file_name, data, header=0, massive=0):
@@ -100,17 +307,11 @@ def write_to_file(file_name, data, header=0, massive=0):
     :param massive: defines whether we send one simple list of data (0) or list of lists (1)
     :return: the function doesn't return anything, it just write data to the file.
     """
-    with open(file_name, 'a', newline='') as file:  # Open file to write data
-        fieldnames = ['id', 'first name', 'last name', 'status', 'phone', 'age']  # define the header
-        writer = csv.DictWriter(file, fieldnames=fieldnames, delimiter=';', dialect='excel')  # and configure parameters
-        if header == 1:  # If we write new data to the file,
-            writer.writeheader()  # first we need to write the header.
-        if massive == 0:  # If we pass only one line of data,
-            writer.writerow(dict(zip(fieldnames, data)))  # we construct only one dictionary {header: data}.
-        else:  # Else if we send several number of lines with data (about some employees),
-            for row in data:  # for each line
-                input_string = dict(zip(fieldnames, row))  # we construct its one dictionary
-                writer.writerow(input_string)  # and write it into the file
+    rows = [data] if massive == 0 else data  # If we pass only one line of data, we make a list of one line.
+    if file_name == EMPLOYEES_FILE:  # New employees of the system go to the storage.
+        get_storage().add_employees(rows)
+    else:
+        write_csv(file_name, EMPLOYEE_FIELDS, rows, header=header == 1)
 
 
 def check_data(first_name, last_name, status, phone, age):
@@ -153,23 +354,24 @@ def clean_phone(phone_number):
     :param phone_number: user-defined phone number
     :return: cleaned phone number
     """
-    new_phone_number = ''
-    for i in phone_number:
-        if i.isdigit():
-            new_phone_number += i
-    return new_phone_number
+    return ''.join(filter(str.isdigit, phone_number))
 
 
 def add_manually(first_name, last_name, status, phone, age):
     """
     The function takes input from user and add it to the file with all employees' data
     """
-    person.add(first_name, last_name, status, phone, age)
+    storage = get_storage()
+    with storage.transaction():  # Nobody else gives employees' ids until we finish.
+        refresh_employees()
+        person.add(first_name, last_name, status, phone, age)
 
-    #  Then we receive the data back with the employee's id number
-    data = person.get_employee()
-    # and call the function to write received data to the file with all employees.
-    write_to_file('employees.csv', data)
+        #  Then we receive the data back with the employee's id number
+        data = person.get_employee()
+        # and call the function to write received data to the file with all employees.
+        write_to_file(EMPLOYEES_FILE, data)
+        registry.add(*data)
+        storage.set_next_id('employees', person.last_id + 1)
 
 
 def add_from_file(file_name):
@@ -177,29 +379,43 @@ def add_from_file(file_name):
     This function adds new employees from file. The file consist of several field of data according to the number
     of people we want to add to our system. The columns are the same: first name, last name, status, phone number and
     age - everything without id number, because it will be constructed by the system.
+    We add all employees from the file or nobody: if some rows are wrong, it raises InvalidRowsError with all of them.
     """
-    # If everything is OK with the file, we put all the data from file into the list persons' data
-    data_to_add = read_from_file(file_name)
-    # Next we need to check every row in our data set for proper values.
-    for row in data_to_add:
-        first_name, last_name, status, phone, age = row.values()
-        phone = clean_phone(phone)
-        try:
-            check_data(first_name, last_name, status, phone, age)
-        except TypeError:
-            return 1
-        except ValueError:
-            return 1
-        except Exception:
-            return 1
-
-    # If again everything is OK, we can add all the data from file to the employees' system.
-    for row in data_to_add:
-        first_name, last_name, status, phone, age = row.values()
-        phone = clean_phone(phone)
-        person.add(first_name, last_name, status, phone, age)
-        data = person.get_employee()
-        write_to_file('employees.csv', data)
+    # We read the file only once: check and clean every row and keep it, if it's correct.
+    rows = []
+    errors = []
+    with open(file_name, 'r', newline='') as file:
+        reader = csv.reader(file, delimiter=';', dialect='excel')
+        next(reader, None)  # Skip the header.
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != 5:
+                errors.append((reader.line_num, 'There have to be 5 values: first name, last name, status, phone '
+                                                'and age.'))
+                continue
+            first_name, last_name, status, phone, age = row
+            phone = clean_phone(phone)
+            try:
+                check_data(first_name, last_name, status, phone, age)
+            except Exception as err:  # TypeError, ValueError or Exception with the description of the problem
+                errors.append((reader.line_num, str(err)))
+            else:
+                rows.append([first_name, last_name, status, phone, age])
+
+    if errors:
+        raise InvalidRowsError(errors)
+
+    # If everything is OK, we give ids to new employees and add them to the storage all together.
+    storage = get_storage()
+    with storage.transaction():
+        refresh_employees()
+        first_id = person.last_id + 1
+        data = [[first_id + number, *row] for number, row in enumerate(rows)]
+        storage.add_employees(data)
+        person.last_id += len(data)
+        registry.add_many(data)
+        storage.set_next_id('employees', person.last_id + 1)
     return 0
 
 
@@ -208,34 +424,34 @@ def delete_manually(index):
     The function deletes an employee from the system. It asks user to enter id number of an employee he wants to delete
     and does it.
     """
-    # First we need to read all the data from an employees' file to manipulate with them.
-    data = read_from_file('employees.csv')
-
-    # Now we need to check, if an employee with this number exists in the system.
-    try:
-        person.delete(index)
-    except ValueError:  # if not, we say to user, that an employee with this id isn't found.
-        return 1
-    else:  # if he exists in the system,
-        rest_of_data = [row for row in data if row['id'] != str(index)]  # we make a list of all employees except him.
-        new_data = [[value for value in item.values()] for item in rest_of_data]  # We need to leave only the values
-        write_to_file('employees-temp.csv', new_data, header=1, massive=1)  # and write it to the temp file
+    with get_storage().transaction():
+        refresh_employees()
+        # First we need to check, if an employee with this number exists in the system.
+        try:
+            person.delete(index)
+        except ValueError:  # if not, we say to user, that an employee with this id isn't found.
+            return 1
+        else:  # if he exists in the system,
+            delete_from_storage([index])  # we delete him from the storage too.
+            return 0
 
-        os.remove('employees.csv', )  # We remove previous file
-        os.rename('employees-temp.csv', 'employees.csv')  # and rename temp file as it used to be.
 
-        return 0
+def delete_from_storage(ids):
+    """
+    The function deletes employees, who have already been deleted from the registry, from the storage.
+    """
+    storage = get_storage()
+    storage.delete_employees(ids, registry.rows())
+    storage.set_next_id('employees', person.last_id + 1)
 
 
 def delete_from_file(file_name):
     """
     The function deletes employees from the system using additional file which consists id-number of employees
-    user wants to delete.
+    user wants to delete. If some of these employees aren't in the system, it raises UnknownEmployeesError
+    with all of their ids and deletes nobody.
     """
-    # First we need to read all the data from an employees' file to manipulate with them.
-    data = read_from_file('employees.csv')
-
-    # Then we ask user to enter the name of the file with employees ids to delete and check the input for errors.
+    # First we ask user to enter the name of the file with employees ids to delete and check the input for errors.
     try:
         check_file(file_name)
     except TypeError:
@@ -245,31 +461,25 @@ def delete_from_file(file_name):
     except ValueError:
         return 1
 
-    # If everything is OK, we read the file with ids and put all the ids into one list of numbers.
+    # If everything is OK, we read the file with ids and put all the ids into one set of numbers.
     with open(file_name, 'r') as file:
         reader = csv.reader(file)
         try:
-            to_delete = []
+            to_delete = set()
             for i in reader:
-                to_delete.append(int(i[0]))
+                to_delete.add(int(i[0]))
         except Exception:
             return 2
 
-    # Now we can dismiss people.
-    for index in to_delete:
-        try:  # If an employee exists in the system, it's OK
-            person.delete(index)
-        except ValueError:  # If not, we raise an error.
-            return 3
-        else:  # Things go on with new data
-            data = [row for row in data if row['id'] != str(index)]
-            new_data = [[value for value in item.values()] for item in data]
-
-            # We write all the rest of the data to the temp file
-            write_to_file('employees-temp.csv', new_data, header=1, massive=1)
+    with get_storage().transaction():
+        refresh_employees()
+        # Now we can dismiss people. If some of them don't exist in the system, it raises an error before we change
+        # anything.
+        person.delete_many(to_delete)
 
-            os.remove('employees.csv', )  # We remove previous file
-            os.rename('employees-temp.csv', 'employees.csv')  # and rename temp file as it used to be.
+        # Then we delete them from the storage only one time.
+        delete_from_storage(to_delete)
+    return 0
 
 
 if __name__ == '__main__':
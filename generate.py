@@ -0,0 +1,117 @@
+"""
+This module makes synthetic data of the system: employees and their attendance for the given number of days.
+
+Data is the same for the same arguments, because every random choice is made by the random generator with the given
+seed. Employees come on working days (Monday - Friday), sometimes they miss a day. Most of them arrive around nine,
+some of them are late, and leave about eight or nine hours later. Files have the usual layout: employees.csv and
+attendance.csv, which the program moves to its storage when it starts.
+
+To make data in a directory run:
+    python generate.py <directory> <employees> <days> [seed]
+"""
+
+import os
+import csv
+import sys
+import random
+import datetime
+
+from partitions import FIELDS as ATTENDANCE_FIELDS
+
+
+EMPLOYEE_FIELDS = ['id', 'first name', 'last name', 'status', 'phone', 'age']
+EMPLOYEES_FILE = 'employees.csv'
+ATTENDANCE_FILE = 'attendance.csv'
+FIRST_DAY = datetime.date(2024, 1, 1)
+
+FIRST_NAMES = ['Elias', 'Rina', 'Miri', 'Roald', 'Mikael', 'Aksel', 'Julia', 'Anna', 'David', 'Noa', 'Yosef', 'Tamar',
+               'Daniel', 'Maya', 'Adam', 'Shira', 'Lior', 'Yael', 'Omer', 'Dana', 'Eitan', 'Roni', 'Itai', 'Hila']
+LAST_NAMES = ['Green', 'Kharari', 'Mukhanson', 'Dal', 'Height', 'Sheffler', 'Donaldson', 'Cohen', 'Levi', 'Mizrahi',
+              'Peretz', 'Biton', 'Dahan', 'Friedman', 'Avraham', 'Katz', 'Azulay', 'Malka', 'Amar', 'Shapiro']
+# Statuses and their shares among employees.
+STATUSES = [('boss', 1), ('senior', 20), ('middle', 40), ('junior', 39)]
+
+ABSENCE = 0.05  # the chance that an employee misses a working day
+ARRIVAL = 9 * 60  # the usual arrival time in minutes since midnight
+ARRIVAL_SPREAD = 20  # the standard deviation of arrival in minutes
+WORK_MINUTES = (8 * 60, 9 * 60 + 30)  # the shortest and the longest working day
+
+
+def make_employees(count, chance):
+    """
+    The function makes rows of employees with ids 1, 2, 3...
+    :param count: the number of employees
+    :param chance: the random generator
+    :return: a list of lists of values in the order of columns of employees' file
+    """
+    statuses = [status for status, _ in STATUSES]
+    weights = [weight for _, weight in STATUSES]
+    rows = []
+    for employee_id in range(1, count + 1):
+        rows.append([employee_id, chance.choice(FIRST_NAMES), chance.choice(LAST_NAMES),
+                     chance.choices(statuses, weights)[0], '05' + ''.join(chance.choices('0123456789', k=8)),
+                     chance.randint(20, 65)])
+    return rows
+
+
+def make_attendance(employees, days, chance, first_day=FIRST_DAY):
+    """
+    The generator yields rows of attendance of the given employees, day by day. Attendance ids go 1, 2, 3...
+    :param employees: rows of employees
+    :param days: the number of days from the first one, weekends are skipped
+    :param chance: the random generator
+    :return: lists of values in the order of columns of the attendance file
+    """
+    attendance_id = 0
+    for offset in range(days):
+        day = first_day + datetime.timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        date = day.isoformat()
+        for employee_id, first_name, last_name, *_ in employees:
+            if chance.random() < ABSENCE:
+                continue
+            arrival = min(max(int(chance.gauss(ARRIVAL, ARRIVAL_SPREAD)), 7 * 60), 12 * 60)
+            departure = arrival + chance.randint(*WORK_MINUTES)
+            attendance_id += 1
+            yield [attendance_id, employee_id, first_name, last_name, date, clock(arrival), date, clock(departure)]
+
+
+def clock(minutes):
+    """
+    The function converts minutes since midnight to time 'HH:MM'.
+    """
+    return '{:02d}:{:02d}'.format(minutes // 60, minutes % 60)
+
+
+def generate(directory, employees_count, days, seed=0):
+    """
+    The function writes employees.csv and attendance.csv with synthetic data to the directory.
+    :return: numbers of employees and attendances
+    """
+    chance = random.Random(seed)
+    employees = make_employees(employees_count, chance)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, EMPLOYEES_FILE), 'w', newline='') as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(EMPLOYEE_FIELDS)
+        writer.writerows(employees)
+
+    count = 0
+    with open(os.path.join(directory, ATTENDANCE_FILE), 'w', newline='') as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(ATTENDANCE_FIELDS)
+        for row in make_attendance(employees, days, chance):
+            writer.writerow(row)
+            count += 1
+    return len(employees), count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) in (4, 5):
+        seed = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+        employees_count, attendance_count = generate(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), seed)
+        print('{} employees and {} attendances are written to {}.'.format(employees_count, attendance_count,
+                                                                         sys.argv[1]))
+    else:
+        print('Usage: python generate.py <directory> <employees> <days> [seed]')
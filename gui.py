@@ -6,11 +6,20 @@ This module describes behaviour of the GUI application.
 from tkinter import *
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import csv
-import datetime
 
+import dates
 from employee import *
 from attendance import *
+from query import Query
+from cache import cached_report
+from table import VirtualTable
+from worker import ReportJob, Cancelled
+from search import MATCHES
+
+try:
+    from reports import iter_late  # the lateness engine finds late arrivals of many rows at once, it needs numpy
+except ImportError:
+    iter_late = None
 
 
 TITLE = 'Employee Attendance Management System'
@@ -32,9 +41,11 @@ def window_position(window, size_hor, size_vert):
     window.resizable(False, False)
 
 
-def show_employees_screen(file, window, title='The list of employees'):
+def show_employees_screen(employees, window, title='The list of employees'):
     """
     The function creates view to show employees on the GUI screen.
+    :param employees: records of employees or rows (id, first name, last name, status, phone, age), the table takes
+    only visible of them (see table.py)
     """
     global frame
     # Construct frame
@@ -48,8 +59,9 @@ def show_employees_screen(file, window, title='The list of employees'):
     # Create tree view
     header = ['id', 'first name', 'last name', 'status', 'phone', 'age']
 
-    tree = ttk.Treeview(frame, columns=header, show="headings")
-    tree.grid(row=1, column=0)
+    table = VirtualTable(frame, header, employees)
+    table.grid(row=1, column=0)
+    tree = table.tree
 
     for col in header:
         tree.heading(col, text=col.title(), anchor="w")
@@ -61,35 +73,16 @@ def show_employees_screen(file, window, title='The list of employees'):
     tree.column('phone', width=100)
     tree.column('age', width=60)
 
-    # For each row in file we add new line to the tree view of employees.
-    with open(file) as f:
-        reader = csv.DictReader(f, delimiter=';')
-        point = 0
-        for row in reader:
-            employee_id = row['id']
-            first_name = row['first name']
-            last_name = row['last name']
-            status = row['status']
-            phone = row['phone']
-            age = row['age']
-            tree.insert('', point, values=(employee_id, first_name, last_name, status, phone, age))
-            point += 1
-
-    tree.config(height=8)
-
-    # Add a scrollbar to the list of employees.
-    scroll_bar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
-    tree.config(yscroll=scroll_bar.set)
-    scroll_bar.grid(row=1, column=1, sticky='ns')
-
     # Create close button.
     close_button = Button(window, text='Close', width=10, command=window.destroy)
     close_button.grid(row=1, column=1, padx=20, pady=10, stick=E)
 
 
-def show_attendance_screen(file, window, title):
+def show_attendance_screen(rows, window, title):
     """
-    The function creates view to show data from attendance file to the screen.
+    The function creates view to show attendance on the screen.
+    :param rows: rows (first name, last name, arrival date, arrival time, departure date, departure time), the table
+    takes only visible of them (see table.py)
     """
     # Construct frame
     frame = Frame(window)
@@ -102,8 +95,9 @@ def show_attendance_screen(file, window, title):
     # Create tree view
     header = ['first name', 'last name', 'arr. date', 'arr. time', 'dep. date', 'dep. time']
 
-    tree = ttk.Treeview(frame, columns=header, show="headings")
-    tree.grid(row=1, column=0)
+    table = VirtualTable(frame, header, rows)
+    table.grid(row=1, column=0)
+    tree = table.tree
 
     for col in header:
         tree.heading(col, text=col.title(), anchor="w")
@@ -115,48 +109,75 @@ def show_attendance_screen(file, window, title):
     tree.column('dep. date', width=70)
     tree.column('dep. time', width=70)
 
-    # For each row in file we add new line to the tree view.
-    with open(file) as f:
-        reader = csv.DictReader(f, delimiter=';')
-        point = 0
-        for row in reader:
-            first_name = row['first name']
-            last_name = row['last name']
-            arrival_date = row['arrival date']
-            arrival_time = row['arrival time']
-            dep_date = row['departure date']
-            dep_time = row['departure time']
-            tree.insert('', point, values=(first_name, last_name, arrival_date, arrival_time, dep_date, dep_time))
-            point += 1
-
-    tree.config(height=8)
-
-    # Add a scroll bar.
-    scroll_bar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
-    tree.config(yscroll=scroll_bar.set)
-    scroll_bar.grid(row=1, column=1, sticky='ns')
-
     # Create close button.
     close_button = Button(window, text='Close', command=window.destroy)
     close_button.grid(row=1, column=1, padx=20, pady=10, stick=E)
 
 
+POLL_MS = 100  # how often the GUI looks whether a report is ready
+
+
+def run_report(build, show, back):
+    """
+    The function builds the report in the background (see worker.py) and shows a screen with its progress and
+    the cancel button meanwhile. The program answers user all this time.
+    :param build: the function build(job) which returns the result of the report
+    :param show: the function show(result) which shows the ready result
+    :param back: the screen which is shown again, if the report is cancelled or fails
+    """
+    job = ReportJob(build)
+
+    # Progress screen.
+    progress_screen = Toplevel()
+    progress_screen.title('Report')
+    progress_screen.iconbitmap(ICON)
+    window_position(progress_screen, 240, 110)
+
+    progress_label = Label(progress_screen, text='The report is being prepared...')
+    progress_label.grid(row=0, column=0, padx=10, pady=(10, 0))
+
+    progress_bar = ttk.Progressbar(progress_screen, mode='indeterminate', length=200)
+    progress_bar.grid(row=1, column=0, padx=20, pady=10)
+    progress_bar.start()
+
+    def cancel():
+        job.cancel()
+        progress_screen.destroy()
+        back.deiconify()
+
+    cancel_button = Button(progress_screen, text='Cancel', width=10, command=cancel)
+    cancel_button.grid(row=2, column=0, pady=(0, 10))
+    progress_screen.protocol('WM_DELETE_WINDOW', cancel)
+
+    def poll():
+        # The report is cancelled, when user closes the progress screen.
+        if not progress_screen.winfo_exists():
+            return
+        if not job.done():
+            progress_label.config(text='Rows read: {}'.format(job.count))
+            progress_screen.after(POLL_MS, poll)
+            return
+
+        progress_screen.destroy()
+        try:
+            result = job.result()
+        except Cancelled:
+            return
+        except Exception as err:
+            messagebox.showerror('Error', 'The report can\'t be prepared: {}'.format(err))
+            back.deiconify()
+            return
+        show(result)
+
+    progress_screen.after(POLL_MS, poll)
+
+
 def list_of_statuses():
     """
     The function creates a list of all employees statuses. We will use it choose status for new employee
     or to select employees for different reports.
     """
-    statuses = set()
-    with open('employees.csv', newline='') as file:
-        data = csv.DictReader(file, delimiter=';')
-        for row in data:
-            status = row['status']
-            statuses.add(status)
-
-    statuses = list(statuses)
-    statuses.sort()
-
-    return statuses
+    return registry.statuses()  # The registry keeps employees of every status, so we don't look at everybody.
 
 
 def add_manually_button():
@@ -194,8 +215,7 @@ def add_manually_button():
         else:
             # If all data is correct, we avoid duplication of employees with status 'boss' in the system,
             # because its impossible in real life.
-            statuses = list_of_statuses()
-            if status == 'boss' and 'boss' in statuses:
+            if status == 'boss' and registry.has_status('boss'):
                 response = messagebox.showerror('Error', 'There cann\'t be two bosses in one company. '
                                                          'Choose another status, please.')
                 if response == 'ok':
@@ -215,7 +235,7 @@ def add_manually_button():
                 break
 
     # Show new data on the screen.
-    show_employees_screen('employees.csv', root)
+    show_employees_screen(registry, root)
 
     # Ask user if he wants to add one more employee.
     response = messagebox.askyesno('Question', 'The employee\'s added successfully. '
@@ -426,15 +446,16 @@ def add_from_file_menu():
         if response == 'ok':
             return
     else:
-        is_err = add_from_file(file_name)
         # Check data in the file
-        if is_err == 1:
-            response = messagebox.showerror('Error', 'Something is wrong with data in file. Check it and try again.')
+        try:
+            add_from_file(file_name)
+        except InvalidRowsError as err:  # Show wrong rows of the file.
+            response = messagebox.showerror('Error', '{}\nCheck the file and try again.'.format(err))
             if response == 'ok':
                 return
 
     # If everything goes right, we show new list of employees on the screen.
-    show_employees_screen('employees.csv', root)
+    show_employees_screen(registry, root)
 
     messagebox.showinfo('Success', 'Employees are added successfully.')
 
@@ -453,13 +474,10 @@ def delete_manually_button():
             id_entry.focus()
             return
     else:
-        # Read employees' ids.
-        data = read_from_file('employees.csv')
-        id_list = []
-        for row in data:
-            id_list.append(int(row['id']))
+        # Find the employee in the registry.
+        employee = registry.get(index)
         # If there is no given employee's id in the system, we show an error.
-        if index not in id_list:
+        if employee is None:
             response = messagebox.showerror('Error', 'There is no employee with number {} in the system.'.format(index))
             if response == 'ok':
                 delete_screen.deiconify()
@@ -468,21 +486,18 @@ def delete_manually_button():
         else:
             # If we've found employee's id, we have to ask user,
             # if he really wants to delete this employee from the system.
-            for row in data:
-                if int(row['id']) == index:
-                    person = (row['first name'], row['last name'])
-                    response = messagebox.askyesno('Warning', 'Are you sure you want to delete {} {} from the system?'.
-                                                   format(person[0], person[1]))
-                    if not response:
-                        return
-                    else:  # And if the answer is yes, we delete him.
-                        delete_manually(index)
+            response = messagebox.askyesno('Warning', 'Are you sure you want to delete {} {} from the system?'.
+                                           format(employee.first_name, employee.last_name))
+            if not response:
+                return
+            else:  # And if the answer is yes, we delete him.
+                delete_manually(index)
 
     # Clear entry.
     id_entry.delete(0, END)
 
     # Show updated list of employees.
-    show_employees_screen('employees.csv', root)
+    show_employees_screen(registry, root)
 
     # Ask if use wants to delete someone else.
     response = messagebox.askyesno('Question', 'The employee\'s deleted successfully. '
@@ -552,7 +567,12 @@ def delete_from_file_menu():
             return
     else:
         # Check data in the file: does it contains employees ids or something wrong.
-        is_err = delete_from_file(file_name)
+        try:
+            is_err = delete_from_file(file_name)
+        except UnknownEmployeesError as err:  # Show all ids which aren't in the system.
+            response = messagebox.showerror('Error', '{} Check your file and try again.'.format(err))
+            if response == 'ok':
+                return
         if is_err == 1:
             response = messagebox.showerror('Error', 'Something is wrong with data in file. Check it and try again.')
             if response == 'ok':
@@ -561,48 +581,76 @@ def delete_from_file_menu():
             response = messagebox.showerror('Error', 'File doesn\'t contain employee\'s ids.  Check it and try again.')
             if response == 'ok':
                 return
-        elif is_err == 3:
-            response = messagebox.showerror('Error', 'There are no employees with ids from this file in the system. '
-                                                     'Check your file and try again.')
-            if response == 'ok':
-                return
         else:
             # If everything is ok, employees deletes and the message box shows to user succeed result.
-            show_employees_screen('employees.csv', root)
+            show_employees_screen(registry, root)
             response = messagebox.showinfo('Success', 'Employees deleted successfully.')
             if response == 'ok':
                 return
 
 
+def employee_search(frame):
+    """
+    The function puts the search box and the list of employees who match the typed text (first name, last name or id)
+    to the frame. Only the first MATCHES of them are shown (see search.py).
+    :return: the function which returns the record of the chosen employee, or None and warns user, if he hasn't
+    chosen anybody
+    """
+    shown = []  # records of employees in the list box in the same order
+
+    search_text = StringVar()
+    search_entry = Entry(frame, textvariable=search_text)
+    search_entry.pack(side=TOP, fill=X, pady=(0, 5))
+
+    employees_listbox = Listbox(frame, height=MATCHES)
+    employees_listbox.pack(side=LEFT, fill=BOTH)
+
+    def update(*args):
+        shown[:] = registry.index.search(search_text.get())  # The registry keeps the index up to date.
+        employees_listbox.delete(0, END)
+        for employee in shown:
+            employees_listbox.insert(END, str(employee.id) + '. ' + employee.first_name + ' ' + employee.last_name)
+        if shown:
+            employees_listbox.activate(0)
+
+    search_text.trace_add('write', update)
+    update()
+    search_entry.focus()
+
+    def chosen():
+        selection = employees_listbox.curselection()
+        position = selection[0] if selection else employees_listbox.index(ACTIVE)
+        if not shown or position >= len(shown):
+            messagebox.showwarning('Warning', 'You didn\'t choose anybody. Please, choose an employee.')
+            top.deiconify()
+            return None
+        return shown[position]
+
+    return chosen
+
+
 def check_arrival():
     """
     The function takes employee's id, name and surname, current date and time and add all this data to the system.
     """
     # Getting data.
-    data = employees_listbox.get(ACTIVE)
-    employee_id, first_name, last_name = data.split()
-    employee_id = employee_id[:-1]
-
-    now = datetime.datetime.today()
-    current_date = now.strftime('%d/%m/%Y')
-
-    # Check if employee has come and didn't leave job yet.
-    attendance_data = read_from_file('attendance.csv')
-    for row in attendance_data:
-        if row['employee id'] == employee_id and row['arrival date'] == current_date:
-            this_row = row
-            if this_row['departure date'] == 'None':
-                response = messagebox.showerror('Error', 'This employee\'s arrived already. '
-                                                         'Choose another one or close the window.')
-                if response == 'ok':
-                    top.deiconify()
-                    return
+    employee = chosen_employee()
+    if employee is None:
+        return
+    employee_id, first_name, last_name = str(employee.id), employee.first_name, employee.last_name
 
-    # Add attendance data to the system.
-    date = datetime.datetime(now.year, now.month, now.day, now.hour, now.minute)
-    time = date.strftime('%H:%M')
-    date = date.strftime('%d/%m/%Y')
-    add_arrival_to_system(employee_id, first_name, last_name, date, time)
+    date, time = dates.now()
+
+    # Add attendance data to the system. If employee has come today and didn't leave job yet (another kiosk may have
+    # checked him), the system returns an error.
+    try:
+        add_arrival_to_system(employee_id, first_name, last_name, date, time)
+    except ArrivedAlreadyError:
+        response = messagebox.showerror('Error', 'This employee\'s arrived already. '
+                                                 'Choose another one or close the window.')
+        if response == 'ok':
+            top.deiconify()
+        return
 
     # Show succeed message.
     response = messagebox.askyesno(top, 'Arrival checked successfully. Do you want to check someone else?')
@@ -616,7 +664,7 @@ def check_arrival_menu():
     """
     Create top level screen to check arrival.
     """
-    global employees_listbox
+    global chosen_employee
     global top
 
     # Screen properties.
@@ -627,23 +675,10 @@ def check_arrival_menu():
     size_vert = 210
     window_position(top, size_hor, size_vert)
 
-    # Frame with lis of employees and scroll bar near it.
+    # Frame with the search box and employees who match it.
     frame = LabelFrame(top, padx=10, pady=10)
     frame.grid(row=0, column=0, rowspan=2, padx=10, pady=10)
-
-    scrollbar = Scrollbar(frame)
-    scrollbar.pack(side=RIGHT, fill=Y)
-
-    employees_listbox = Listbox(frame)
-
-    data = read_from_file('employees.csv')
-    for row in data:
-        employees_listbox.insert(END, row['id'] + '. ' + row['first name'] + ' ' + row['last name'])
-
-    employees_listbox.pack(side=LEFT, fill=BOTH)
-
-    employees_listbox.config(yscrollcommand=scrollbar.set)
-    scrollbar.config(command=employees_listbox.yview)
+    chosen_employee = employee_search(frame)
 
     # Create buttons
     check_button = Button(top, text='Check Arrival', command=check_arrival)
@@ -657,36 +692,22 @@ def check_departure():
     """
     The function takes employee's id, current date and time and add departure's data to the system.
     """
-    data = employees_listbox.get(ACTIVE)
-    employee_id, first_name, last_name = data.split()
-    employee_id = employee_id[:-1]
-
-    # Check if we have all this data in the system. If the employee has gone yet, e.g. his departure date and time
-    # not equal 'None', the system returns an error.
-    attendance_data = read_from_file('attendance.csv')
-
-    flag = False
-    for row in attendance_data:
-        if row['employee id'] == employee_id and row['departure date'] == 'None':
-            flag = True
+    employee = chosen_employee()
+    if employee is None:
+        return
+    employee_id = str(employee.id)
 
-    if not flag:
+    # Update data in the system: close the open attendance of the employee who is going away now. If the employee
+    # has gone yet, e.g. he hasn't got open attendance, the system returns an error.
+    date, time = dates.now()
+    try:
+        add_departure_to_system(None, date, time, employee_id)
+    except GoneAlreadyError:
         response = messagebox.showerror('Error', 'This employee has gone already. '
                                                  'Choose another one or close the window.')
         if response == 'ok':
             top.deiconify()
-            return
-
-    # Update data in the system according to the id of the employee who is going away now.
-    for row in attendance_data:
-        if row['employee id'] == employee_id and row['departure date'] == 'None':
-            this_row = row
-            attendance_id = this_row['attendance id']
-            now = datetime.datetime.today()
-            date = datetime.datetime(now.year, now.month, now.day, now.hour, now.minute)
-            time = date.strftime('%H:%M')
-            date = date.strftime('%d/%m/%Y')
-            add_departure_to_system(attendance_id, date, time)
+        return
 
     # Show succeed message and ask use if he wants to check some employee's arrival else.
     response = messagebox.askyesno(top, 'Departure checked successfully. Do you want to check someone else?')
@@ -700,7 +721,7 @@ def check_departure_menu():
     """
     Create top level screen to check departure.
     """
-    global employees_listbox
+    global chosen_employee
     global top
     # Screen properties.
     top = Toplevel()
@@ -710,23 +731,10 @@ def check_departure_menu():
     size_vert = 210
     window_position(top, size_hor, size_vert)
 
-    # Create frame with employees' names listbox and scroll bar near it.
+    # Create frame with the search box and employees who match it.
     frame = LabelFrame(top, height=100, width=30, padx=10, pady=10)
     frame.grid(row=0, column=0, rowspan=2, padx=10, pady=10)
-
-    scrollbar = Scrollbar(frame)
-    scrollbar.pack(side=RIGHT, fill=Y)
-
-    employees_listbox = Listbox(frame)
-
-    data = read_from_file('employees.csv')
-    for row in data:
-        employees_listbox.insert(END, row['id'] + '. ' + row['first name'] + ' ' + row['last name'])
-
-    employees_listbox.pack(side=LEFT, fill=BOTH)
-
-    employees_listbox.config(yscrollcommand=scrollbar.set)
-    scrollbar.config(command=employees_listbox.yview)
+    chosen_employee = employee_search(frame)
 
     # Create buttons.
     check_button = Button(top, text='Check Departure', command=check_departure)
@@ -762,29 +770,24 @@ def show_employees_button():
             if item != status_list[-1]:
                 title += ','
 
-    # Show report in a new screen.
-    top_show = Toplevel()
-    top_show.title("Show employees")
-    top_show.iconbitmap(ICON)
-    top_show.resizable(False, False)
-
-    # Select employees with necessary statuses from the system.
-    data = read_from_file('employees.csv')
-    data = [row for row in data if row['status'] in status_list]
+    # Select employees with necessary statuses from the system in the background. If data hasn't changed since we
+    # showed the same report last time, we take the result we've kept. The report reads a copy of the registry,
+    # because user may add or delete employees meanwhile.
+    employees = registry.snapshot()
 
-    # Write chosen employees to the temp file.
-    with open('employees_temp.csv', 'a', newline='') as file:  # Open file to write data
-        fieldnames = ['id', 'first name', 'last name', 'status', 'phone', 'age']  # define the header
-        writer = csv.DictWriter(file, fieldnames=fieldnames, delimiter=';', dialect='excel')  # and configure parameters
-        writer.writeheader()
-        for row in data:
-            writer.writerow(row)  # and write it into the file
+    def build_report(job):
+        return cached_report(('employees', frozenset(status_list)),
+                             lambda: tuple(job.rows(Query(statuses=status_list, employees=employees).employees())))
 
-    # Show them in a new screnn.
-    show_employees_screen('employees_temp.csv', top_show, title)
+    def show_report(data):
+        # Show report in a new screen.
+        top_show = Toplevel()
+        top_show.title("Show employees")
+        top_show.iconbitmap(ICON)
+        top_show.resizable(False, False)
+        show_employees_screen(data, top_show, title)
 
-    # Remove temp file.
-    os.remove('employees_temp.csv')
+    run_report(build_report, show_report, select_status_screen)
 
 
 def show_employees():
@@ -858,62 +861,45 @@ def show_attendance_button():
             if item != status_list[-1]:
                 title += ','
 
-    # Select employees with necessary statuses from the system.
-    data = read_from_file('employees.csv')
-    data = [row for row in data if row['status'] in status_list]
-
-    # Select necessary employees' ids
-    id_list = []
-    for row in data:
-        id_list.append(row['id'])
-
-    # Create new screen to show data of attendance.
-    top_show = Toplevel()
-    top_show.title("Show employees")
-    top_show.iconbitmap(ICON)
-    top_show.resizable(False, False)
-
-    # Choose employees to show
-    att_data = read_from_file('attendance.csv')
-    att_data = [row for row in att_data if row['employee id'] in id_list]
-
-    # If user want to show only employees who are late, e.g. comes to work after 9:30 in the morning.
-    right_time = datetime.datetime.strptime('9:30', '%H:%M')
-    new_data = []
-    flag = False
-    if var.get() == 1:
+    # Choose attendance of employees with necessary statuses. If user want to show only employees who are late,
+    # e.g. comes to work after 9:30 in the morning (the time for every status is set in config.py), the lateness
+    # engine (see reports.py) keeps only late arrivals.
+    late_only = var.get() == 1
+    if late_only:
         title += ' who comes late'
-        for row in att_data:
-            arrival_time = row['arrival time']
-            arrival_time = datetime.datetime.strptime(arrival_time, '%H:%M')
-            if arrival_time > right_time:
-                flag = True
-                new_data.append(row)
-        # If there are no employees to show, raise info message.
-        if not flag:
-            top_show.destroy()
+
+    # The report is built in the background from a copy of the registry. If data hasn't changed since we showed
+    # the same report last time, we take the result we've kept.
+    employees = registry.snapshot()
+
+    def build_report(job):
+        def read_rows():
+            if late_only and iter_late is not None:
+                rows = iter_late(job.rows(Query(statuses=status_list, employees=employees).attendance()),
+                                 employee_index=0, time_index=6, employees=employees)
+            else:  # Without numpy the query checks every arrival itself.
+                rows = job.rows(Query(statuses=status_list, late=late_only, employees=employees).attendance())
+            return tuple((row.first_name, row.last_name, dates.to_user(row.arrival_date), row.arrival_time,
+                          dates.to_user(row.departure_date), row.departure_time) for row in rows)
+
+        return cached_report(('attendance', frozenset(status_list), late_only), read_rows)
+
+    def show_report(att_data):
+        # If there are no employees who are late, raise info message.
+        if late_only and not att_data:
             response = messagebox.showinfo('Info', 'These employees never come late.')
             if response == 'ok':
                 select_status_screen.deiconify()
-                return
-        else:
-            att_data = new_data
-
-    # Create temp attendance file with data to show.
-    with open('attendance_temp.csv', 'a', newline='') as file:
-        fieldnames = ['first name', 'last name', 'arrival date', 'arrival time', 'departure date', 'departure time']
-        writer = csv.DictWriter(file, fieldnames=fieldnames, delimiter=';', dialect='excel')
-        writer.writeheader()
-        for row in att_data:
-            del row['attendance id']
-            del row['employee id']
-            writer.writerow(row)
+            return
 
-    # Show attendance data on the screen.
-    show_attendance_screen('attendance_temp.csv', top_show, title)
+        # Create new screen to show data of attendance.
+        top_show = Toplevel()
+        top_show.title("Show employees")
+        top_show.iconbitmap(ICON)
+        top_show.resizable(False, False)
+        show_attendance_screen(att_data, top_show, title)
 
-    # Remove temp file.
-    os.remove('attendance_temp.csv')
+    run_report(build_report, show_report, select_status_screen)
 
 
 def show_attendance():
@@ -1060,7 +1046,7 @@ def main_screen():
     mainmenu.add_command(label='Help', command=show_help)
 
     # Printing employees on the screen.
-    show_employees_screen('employees.csv', root)
+    show_employees_screen(registry, root)
 
     root.mainloop()
 
@@ -0,0 +1,176 @@
+"""
+This module adds arrivals and departures from logs of turnstiles and badge readers.
+
+A swipe log is a csv file with columns 'employee id', 'date' ('dd/mm/YYYY' or 'YYYY-MM-DD'), 'time' ('HH:MM') and
+optional column 'direction' ('in' or 'out'). If there is no direction, we pair swipes ourselves: the swipe of an
+employee who is at work since the same day is his departure, any other swipe is an arrival. An arrival of an employee
+who is at work since the same day or a later one is a wrong swipe. If he is at work since an earlier day, he has
+forgotten to swipe out, and that attendance is closed at its arrival.
+
+All swipes are applied together: new attendances are written to the storage at once and departures of attendances
+which were opened before are written in one pass.
+
+To add a swipe log run:
+    python ingest.py <swipe log>
+"""
+
+import sys
+import csv
+import time
+import datetime
+
+from employee import registry, load_employees
+from attendance import attendance, load_attendance_state, refresh_attendance_state, save_attendance_state, \
+    close_forgotten_session
+from storage import get_storage
+from worktime import worked_minutes
+from dates import read_date, DATE_FORMAT, TIME_FORMAT
+
+
+# Columns which every swipe log has, 'direction' is optional.
+COLUMNS = ['employee id', 'date', 'time']
+
+
+class MissingColumnsError(ValueError):
+    """
+    The exception is raised when the swipe log hasn't got some of the necessary columns. It keeps all of them.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        super().__init__('The swipe log has no columns {}. Its first line has to name the columns {}.'.format(
+            ', '.join("'{}'".format(column) for column in columns), ', '.join(COLUMNS)))
+
+
+def read_swipes(file_name):
+    """
+    The function reads the swipe log and sorts swipes by date and time. If the log hasn't got the necessary columns,
+    it raises MissingColumnsError and reads no swipes.
+    :return: a list of sorted swipes (date and time, employee id, direction, line number) and a list of wrong lines
+    (line number, what is wrong)
+    """
+    swipes = []
+    errors = []
+    with open(file_name, 'r', newline='') as file:
+        reader = csv.DictReader(file, delimiter=';', dialect='excel')
+        missing = [column for column in COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise MissingColumnsError(missing)
+        for row in reader:
+            if any(row[column] is None for column in COLUMNS):  # The line is shorter than the header.
+                errors.append((reader.line_num, 'Some values are missing.'))
+                continue
+            if not row['employee id'].strip():
+                errors.append((reader.line_num, 'Employee id is missing.'))
+                continue
+            try:
+                moment = datetime.datetime.combine(read_date(row['date']),
+                                                   datetime.datetime.strptime(row['time'].strip(), TIME_FORMAT).time())
+            except (TypeError, ValueError):
+                errors.append((reader.line_num, 'Wrong date or time.'))
+                continue
+            direction = (row.get('direction') or '').strip().lower()
+            if direction not in ('', 'in', 'out'):
+                errors.append((reader.line_num, "Direction has to be 'in' or 'out'."))
+                continue
+            swipes.append((moment, row['employee id'].strip(), direction, reader.line_num))
+    swipes.sort()
+    return swipes, errors
+
+
+def close_swipe(session, date, time_, new_rows, departures):
+    """
+    The function sets the departure of the open attendance: in its row, if the attendance is opened by this log,
+    or among departures of attendances opened before.
+    """
+    attendance_id = session[0]
+    if attendance_id in new_rows:  # The attendance isn't written yet, so we just fill its departure.
+        new_rows[attendance_id][6:8] = [date, time_]
+    else:
+        departures.append((attendance_id, date, time_))
+
+
+def ingest(file_name):
+    """
+    The function adds all arrivals and departures from the swipe log to the system.
+    :param file_name: the swipe log
+    :return: a dictionary with numbers of swipes, arrivals, departures, wrong swipes (and their list), seconds
+    and swipes per second
+    """
+    started = time.perf_counter()
+    swipes, errors = read_swipes(file_name)
+
+    storage = get_storage()
+    with storage.transaction():  # Kiosks wait until the whole log is added.
+        refresh_attendance_state()
+        new_rows = {}  # attendances opened by this log: {attendance id: row}
+        departures = []  # departures of attendances opened before
+        worked = []  # closed attendances for the table of worked time
+        arrivals_count = departures_count = 0
+        for moment, employee_id, direction, line in swipes:
+            employee = registry.get(employee_id) if employee_id.isdigit() else None
+            if employee is None:
+                errors.append((line, 'There is no employee with number {} in the system.'.format(employee_id)))
+                continue
+            employee_id = str(employee.id)
+            date = moment.strftime(DATE_FORMAT)
+            now = moment.strftime(TIME_FORMAT)
+            session = attendance.open_sessions.get(employee_id)
+
+            if direction:
+                is_arrival = direction == 'in'
+            else:
+                is_arrival = session is None or session[1] != date
+
+            if is_arrival and session is not None and session[1] >= date:  # He is at work since this day or later.
+                errors.append((line, 'The employee {} has arrived already.'.format(employee_id)))
+            elif is_arrival:
+                forgotten = close_forgotten_session(employee_id, date)
+                if forgotten is not None:  # He hasn't swiped out on an earlier date.
+                    close_swipe(forgotten, forgotten[1], forgotten[2], new_rows, departures)
+                    worked.append((employee_id, forgotten[1], 0, 1))
+                attendance.last_id += 1
+                new_rows[attendance.last_id] = [attendance.last_id, employee_id, employee.first_name,
+                                                employee.last_name, date, now, 'None', 'None']
+                attendance.open_sessions[employee_id] = (attendance.last_id, date, now)
+                arrivals_count += 1
+            elif session is None:
+                errors.append((line, 'The employee {} hasn\'t arrived.'.format(employee_id)))
+            else:
+                close_swipe(session, date, now, new_rows, departures)
+                worked.append((employee_id, session[1], worked_minutes(session[1], session[2], date, now), 1))
+                del attendance.open_sessions[employee_id]
+                departures_count += 1
+
+        if new_rows:
+            storage.append_attendance(list(new_rows.values()))
+        if departures:
+            storage.set_departures(departures)
+        if worked:
+            storage.add_worked_time(worked)
+        save_attendance_state()
+        storage.flush()
+
+    seconds = time.perf_counter() - started
+    return {'swipes': len(swipes), 'arrivals': arrivals_count, 'departures': departures_count,
+            'wrong': len(errors), 'errors': sorted(errors), 'seconds': seconds,
+            'swipes per second': len(swipes) / seconds if seconds > 0 else 0}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('Usage: python ingest.py <swipe log>')
+        sys.exit(1)
+
+    load_employees()
+    load_attendance_state()
+    try:
+        result = ingest(sys.argv[1])
+    except MissingColumnsError as err:
+        print(err)
+        sys.exit(1)
+
+    print('{swipes} swipes: {arrivals} arrivals, {departures} departures, {wrong} wrong.'.format(**result))
+    for line, message in result['errors'][:10]:
+        print('line {}: {}'.format(line, message))
+    print('Done in {:.3f} seconds, {:.0f} swipes per second.'.format(result['seconds'], result['swipes per second']))
@@ -0,0 +1,126 @@
+"""
+This module helps several programs (e.g. kiosks) use the same data files at once.
+
+FileLock is an advisory lock of the whole storage kept on a small lock file. Programs which change data take it
+exclusively, programs which only read data take it shared, so they read together but never see a half-written change.
+On Windows msvcrt has only exclusive locks, so there readers wait for each other too.
+
+atomic_write() writes a new version of a file to a temp file with a unique name next to it and puts it instead of the
+old one in one step with os.replace(), so two programs never write to the same temp file and readers see either the
+old or the new file.
+"""
+
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Permissions of new files: os.umask() can only be read by setting it, so we do it once, before other threads start.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def lock_file(file, shared=False):
+    """
+    The function waits until it locks the open file.
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        return
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after 10 seconds, but we wait as long as we need.
+            continue
+
+
+def unlock_file(file):
+    """
+    The function unlocks the open file.
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    The lock shared by all programs which use the same lock file. Threads of one program also wait for each other,
+    because every thread locks its own open file. Inside one thread the lock can be taken again (e.g. a transaction
+    calls methods which lock the storage themselves), but a thread which reads the storage can't start to change it.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.local = threading.local()  # how many times and how this thread holds the lock
+
+    def exclusive(self):
+        """
+        Method returns a context manager which holds the lock alone: for changing data.
+        """
+        return self.hold(shared=False)
+
+    def shared(self):
+        """
+        Method returns a context manager which holds the lock together with other readers: for reading data.
+        """
+        return self.hold(shared=True)
+
+    @contextmanager
+    def hold(self, shared):
+        depth = getattr(self.local, 'depth', 0)
+        if depth:  # This thread holds the lock already.
+            if self.local.shared and not shared:
+                raise RuntimeError("The storage can't be changed while it's being read.")
+            self.local.depth += 1
+            try:
+                yield
+            finally:
+                self.local.depth -= 1
+            return
+
+        with open(self.file_name, 'a+b') as file:
+            lock_file(file, shared)
+            self.local.depth, self.local.shared = 1, shared
+            try:
+                yield
+            finally:
+                self.local.depth = 0
+                unlock_file(file)
+
+
+@contextmanager
+def atomic_write(file_name):
+    """
+    The context manager gives a text file for writing a new version of the given file. When the block ends without
+    errors, the new version is put instead of the old one in one step, otherwise the old file stays as it was.
+    """
+    directory, base_name = os.path.split(os.path.abspath(file_name))
+    descriptor, temp_name = tempfile.mkstemp(prefix=base_name + '.', suffix='.tmp', dir=directory)
+    try:
+        with open(descriptor, 'w', newline='') as file:
+            yield file
+        # mkstemp() makes the file private, but the new version has to keep permissions of the old one.
+        try:
+            mode = stat.S_IMODE(os.stat(file_name).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+        os.chmod(temp_name, mode)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        try:
+            os.remove(temp_name)
+        except FileNotFoundError:
+            pass
+        raise
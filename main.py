@@ -2,32 +2,17 @@
 from employee import *
 from attendance import *
 from gui import main_screen
-import csv
 
-# We open a file with employee's data to identify their numbers and send them to the list of ids in employee class.
+# We load all employees to the registry and find the last employee's number.
 # It's necessary if we want to add new employee: he has to have the next number after
 # the last employee's number in the system.
-# If file does not exist, we skip an error. We'll create it with the first employee.
-try:
-    with open('employees.csv', 'r', newline='') as file:
-        data = csv.DictReader(file, delimiter=';', dialect='excel')
-        indexes = []
-        for row in data:
-            indexes.append(int(row['id']))
-        person.ids = indexes
-except FileNotFoundError:
-    pass
+# If file does not exist, the registry stays empty. We'll create the file with the first employee.
+load_employees()
 
-# Also we need to open attendance file to read data from it and send attendance ids to the system for the same purpose.
-try:
-    with open('attendance.csv', 'r', newline='') as file:
-        data = csv.DictReader(file, delimiter=';', dialect='excel')
-        indexes = []
-        for row in data:
-            indexes.append(int(row['attendance id']))
-        attendance.ids = indexes
-except FileNotFoundError:
-    pass
+# Also we need the last attendance id for the same purpose and the list of employees who have come and haven't left
+# yet, so we can check arrival and departure without reading the whole attendance history. We keep them in small
+# files next to the attendance file, so usually we don't read attendance file at all.
+load_attendance_state()
 
 # So we start the program.
 main_screen()
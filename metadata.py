@@ -0,0 +1,81 @@
+"""
+This module keeps a small metadata file next to the data files of the system.
+
+For every data file (employees.csv, the directory with attendance partitions) the metadata file remembers the next
+id number we have to give to a new row and the size and time of the last change of the data file at the moment
+we wrote it down. So when the program starts, it doesn't need to read all the data to find the last id. If the data
+file has been changed without us (or the metadata file is lost), we see that the size or time doesn't match and read
+the data file once to rebuild the metadata.
+"""
+
+import os
+import csv
+
+from locking import atomic_write
+
+
+METADATA_FILE = 'metadata.csv'
+FIELDS = ['file', 'size', 'modified', 'next id']
+
+
+def file_stamp(file_name):
+    """
+    The function returns size and time of the last change of the file, or zeros if the file doesn't exist.
+    For a directory it returns the total size and the time of the last change of all files in it.
+    """
+    if os.path.isdir(file_name):
+        size, modified = 0, 0
+        for entry in os.scandir(file_name):
+            if entry.is_file():
+                info = entry.stat()
+                size += info.st_size
+                modified = max(modified, info.st_mtime_ns)
+        return size, modified
+    try:
+        info = os.stat(file_name)
+    except FileNotFoundError:
+        return 0, 0
+    return info.st_size, info.st_mtime_ns
+
+
+def read_metadata():
+    """
+    The function reads the metadata file.
+    :return: a dictionary {name of the data file: (size, time of the last change, next id)}
+    """
+    metadata = {}
+    try:
+        with open(METADATA_FILE, 'r', newline='') as file:
+            for row in csv.DictReader(file, delimiter=';', dialect='excel'):
+                metadata[row['file']] = (int(row['size']), int(row['modified']), int(row['next id']))
+    except (FileNotFoundError, KeyError, ValueError, TypeError):  # A broken file is the same as a lost one.
+        return {}
+    return metadata
+
+
+def get_next_id(file_name):
+    """
+    The function returns the next id for the given data file, or None, if we don't know it or the data file
+    has been changed since we wrote the metadata down.
+    """
+    record = read_metadata().get(file_name)
+    if record is None or (record[0], record[1]) != file_stamp(file_name):
+        return None
+    return record[2]
+
+
+def set_next_id(file_name, next_id):
+    """
+    The function writes down the next id for the given data file together with the current size and time of the
+    last change of this file. We call it every time after we change the data file.
+    """
+    metadata = read_metadata()
+    size, modified = file_stamp(file_name)
+    metadata[file_name] = (size, modified, next_id)
+
+    # Write the whole (small) file to the temp file and put it instead of the old one in one step.
+    with atomic_write(METADATA_FILE) as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(FIELDS)
+        for name, record in sorted(metadata.items()):
+            writer.writerow([name, *record])
@@ -0,0 +1,548 @@
+"""
+This module keeps attendance data in several csv files: one file (partition) for every month of arrival.
+
+All partitions are in the attendance data directory. The manifest file in the same directory describes every
+partition: its first and last arrival date, the number of rows in it and whether its rows are sorted by arrival date.
+New arrivals are written only to the partition of their month, and if we need attendance for some dates, we open only
+partitions which have these dates. In a sorted partition we find the first row of the dates by binary search over
+offsets of its lines and stop at the first row after them.
+
+Every partition has the usual layout of attendance file. While an employee is at work, his departure date and time are
+'None', padded with leading spaces up to the width of a real date and time, so later we can write departure right
+over them without moving the rest of the file. The index file keeps for every attendance id the partition and the
+offset of its departure, so we find it without reading anything else.
+"""
+
+import os
+import io
+import csv
+import struct
+
+import csvfile
+from dates import parse_date, to_iso, is_old_date
+from locking import atomic_write
+
+
+# Names of the directory and files where we keep attendance data.
+PARTITION_DIR = 'attendance_data'
+MANIFEST_FILE = os.path.join(PARTITION_DIR, 'manifest.csv')
+INDEX_FILE = os.path.join(PARTITION_DIR, 'attendance.idx')
+LEGACY_FILE = 'attendance.csv'  # the single attendance file of older versions
+
+# Columns of the attendance partitions and of the manifest.
+FIELDS = ['attendance id', 'employee id', 'first name', 'last name', 'arrival date', 'arrival time',
+          'departure date', 'departure time']
+MANIFEST_FIELDS = ['partition', 'first date', 'last date', 'rows', 'sorted']
+
+# Reserved place for departure of an open attendance. Readers skip the leading spaces, so they still see 'None'.
+OPEN_DEPARTURE_DATE = 'None'.rjust(10)
+OPEN_DEPARTURE_TIME = 'None'.rjust(5)
+OPEN_SLOT = (OPEN_DEPARTURE_DATE + ';' + OPEN_DEPARTURE_TIME).encode()
+SLOT_SIZE = len(OPEN_SLOT)
+LINE_END = b'\r\n'  # the line terminator of the excel dialect
+
+# Each record of the index file is the partition number (year * 100 + month, 0 - unknown) and the offset of departure
+# in this partition. The record of attendance id N is the N-th one.
+INDEX_RECORD = struct.Struct('<IQ')
+
+
+def partition_of(arrival_date):
+    """
+    The function returns the name of the partition for the given arrival date, e.g. '2020-02-04' -> '2020-02'.
+    """
+    parse_date(arrival_date)  # Make sure it's a date.
+    return arrival_date[:7]
+
+
+def is_sorted(dates):
+    """
+    The function says whether dates 'YYYY-MM-DD' go in order.
+    """
+    return all(first <= second for first, second in zip(dates, dates[1:]))
+
+
+def partition_path(name):
+    """
+    The function returns the path of the partition file.
+    """
+    return os.path.join(PARTITION_DIR, name + '.csv')
+
+
+def partition_number(name):
+    """
+    The function converts the name of the partition to the number we keep in the index: '2020-02' -> 202002.
+    """
+    return int(name.replace('-', ''))
+
+
+def partition_name(number):
+    """
+    The function converts the number of the partition from the index back to its name: 202002 -> '2020-02'.
+    """
+    return '{:04d}-{:02d}'.format(number // 100, number % 100)
+
+
+def pad_departure(row):
+    """
+    The function reserves place for departure in the row of attendance which hasn't got it yet.
+    :param row: a list of values in the order of columns
+    :return: a new list
+    """
+    row = list(row)
+    if str(row[6]).strip() == 'None' and str(row[7]).strip() == 'None':
+        row[6] = OPEN_DEPARTURE_DATE
+        row[7] = OPEN_DEPARTURE_TIME
+    return row
+
+
+def read_manifest():
+    """
+    The function reads the manifest. If it's lost, the function rebuilds it from partition files.
+    :return: a dictionary {partition: {'first date': ..., 'last date': ..., 'rows': ..., 'sorted': ...}} sorted
+    by partitions
+    """
+    if not os.path.isfile(MANIFEST_FILE):
+        return rebuild_manifest()
+    manifest = {}
+    with open(MANIFEST_FILE, 'r', newline='') as file:
+        for row in csv.DictReader(file, delimiter=';', dialect='excel'):
+            manifest[row['partition']] = {'first date': row['first date'], 'last date': row['last date'],
+                                          'rows': int(row['rows']), 'sorted': row.get('sorted') == '1'}
+    return dict(sorted(manifest.items()))
+
+
+def write_manifest(manifest):
+    """
+    The function writes the manifest to the temp file and puts it instead of the old one in one step.
+    """
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    with atomic_write(MANIFEST_FILE) as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(MANIFEST_FIELDS)
+        for name, info in sorted(manifest.items()):
+            writer.writerow([name, info['first date'], info['last date'], info['rows'], int(info['sorted'])])
+
+
+def rebuild_manifest():
+    """
+    The function reads all partition files and writes the manifest again.
+    """
+    manifest = {}
+    if os.path.isdir(PARTITION_DIR):
+        for file_name in sorted(os.listdir(PARTITION_DIR)):
+            name, extension = os.path.splitext(file_name)
+            if extension != '.csv' or file_name == os.path.basename(MANIFEST_FILE):
+                continue
+            dates = [row['arrival date'] for row in read_partition(name)]
+            if dates:
+                manifest[name] = {'first date': min(dates), 'last date': max(dates), 'rows': len(dates),
+                                  'sorted': is_sorted(dates)}
+        write_manifest(manifest)
+    return manifest
+
+
+def partitions_between(start=None, end=None):
+    """
+    The function returns names of partitions which have arrivals between given dates (datetime.date, both included).
+    If a date isn't given, the range is open from this side.
+    """
+    start = start.isoformat() if start is not None else None
+    end = end.isoformat() if end is not None else None
+    names = []
+    for name, info in read_manifest().items():
+        if start is not None and info['last date'] < start:
+            continue
+        if end is not None and info['first date'] > end:
+            continue
+        names.append(name)
+    return names
+
+
+def read_partition(name):
+    """
+    The function reads all rows of one partition.
+    :return: a list of dictionaries {name of the column: a piece of data}
+    """
+    try:
+        return csvfile.read_csv(partition_path(name), skipinitialspace=True)
+    except FileNotFoundError:
+        return []
+
+
+def iter_rows(columns=None, predicate=None, start=None, end=None, hold=None):
+    """
+    The generator yields tuples with values of the given columns of attendances with arrival between given dates
+    (datetime.date, both included). It opens only partitions which have these dates and reads them row by row.
+    :param columns: names of the columns we need in this order, all columns if None
+    :param predicate: a function which takes a tuple of values and says whether we need this row
+    :param hold: a function which returns a context manager (e.g. the lock of the storage) or None. If it's given,
+    the manifest and every partition are read inside it, and rows of a partition are yielded after it ends, so we
+    don't hold the lock while the caller works with them. Then only one partition is kept in memory.
+    """
+    columns = list(FIELDS if columns is None else columns)
+    start_date = start.isoformat() if start is not None else None
+    end_date = end.isoformat() if end is not None else None
+
+    def read(name, info):
+        # If the whole partition is between given dates, we don't need to check every row.
+        first = start_date if start_date is not None and info['first date'] < start_date else None
+        last = end_date if end_date is not None and info['last date'] > end_date else None
+        return iter_partition(name, columns, predicate, first, last, info['sorted'])
+
+    if hold is None:
+        manifest = read_manifest()
+        for name in partitions_between(start, end):
+            try:
+                yield from read(name, manifest[name])
+            except FileNotFoundError:
+                continue
+        return
+
+    with hold():
+        names = partitions_between(start, end)
+    for name in names:
+        with hold():  # Others may have changed the partition since we took the list, so we read its manifest again.
+            info = read_manifest().get(name)
+            try:
+                rows = list(read(name, info)) if info is not None else []
+            except FileNotFoundError:
+                rows = []
+        yield from rows
+
+
+def iter_partition(name, columns, predicate=None, start=None, end=None, ordered=False):
+    """
+    The generator yields tuples with values of the given columns of one partition with arrival between given dates
+    ('YYYY-MM-DD', both included, None - don't check). If rows of the partition are sorted by arrival date, it starts
+    from the first row of the dates (see seek_date()) and stops after the last one.
+    """
+    with open(partition_path(name), 'rb') as file:
+        header = next(csv.reader([file.readline().decode('latin-1')], delimiter=';', dialect='excel',
+                                 skipinitialspace=True), None)
+        if not header:  # The partition is empty.
+            return
+        if ordered and start is not None:
+            seek_date(file, start)
+            start = None  # Next rows aren't earlier.
+        pick = csvfile.column_picker(header, columns)
+        date_index = header.index('arrival date')
+        check = start is not None or end is not None
+        reader = csv.reader(io.TextIOWrapper(file, newline=''), delimiter=';', dialect='excel', skipinitialspace=True)
+        for row in reader:
+            if not row:
+                continue
+            if check:
+                date = row[date_index]
+                if end is not None and date > end:
+                    if ordered:
+                        break
+                    continue
+                if start is not None and date < start:
+                    continue
+            values = pick(row)
+            if predicate is None or predicate(values):
+                yield values
+
+
+def arrival_date_of(line):
+    """
+    The function returns the arrival date from a line of a partition (bytes).
+    """
+    return next(csv.reader([line.decode('latin-1')], delimiter=';', dialect='excel', skipinitialspace=True))[4]
+
+
+def seek_date(file, date):
+    """
+    The function moves the partition file (opened in binary mode), where rows are sorted by arrival date, to the first
+    row with arrival date not earlier than the given one ('YYYY-MM-DD'). It's the binary search over offsets: from any
+    offset we go to the beginning of the next line and look at its date.
+    """
+    file.seek(0)
+    file.readline()  # Skip the header.
+    low = file.tell()
+    high = file.seek(0, os.SEEK_END)
+    # Lines which begin before low are earlier than the date. The line which begins at high or after it isn't.
+    while low < high:
+        middle = (low + high) // 2
+        file.seek(middle - 1)
+        file.readline()  # Go to the beginning of the next line.
+        position = file.tell()
+        line = file.readline()
+        if line.strip() and arrival_date_of(line) < date:
+            low = position + 1
+        else:
+            high = middle
+    file.seek(low - 1)
+    file.readline()
+
+
+def read_rows(start=None, end=None):
+    """
+    The function yields rows of attendance with arrival between given dates (datetime.date, both included)
+    as dictionaries {name of the column: a piece of data}.
+    """
+    for values in iter_rows(start=start, end=end):
+        yield dict(zip(FIELDS, values))
+
+
+def append_rows(rows, sync=False):
+    """
+    The function appends rows of attendance to partitions of their arrival months and updates the manifest
+    and the index.
+    :param rows: a list of lists of values in the order of columns
+    :param sync: if True, we wait until the rows and the index are really on the disk (fsync)
+    """
+    # Group rows by partitions, so we open every partition only once.
+    groups = {}
+    for row in rows:
+        groups.setdefault(partition_of(row[4]), []).append(pad_departure(row))
+
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    manifest = read_manifest()
+    entries = []
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';', dialect='excel')
+    for name, group in groups.items():
+        path = partition_path(name)
+        is_new = not os.path.isfile(path)
+        with open(path, 'a', newline='') as file:
+            position = file.tell()
+            if is_new:  # A new partition starts with the header.
+                writer.writerow(FIELDS)
+            for row in group:
+                writer.writerow(row)
+                line = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                file.write(line)
+                position += len(line.encode(file.encoding))
+                # Departure columns are the last ones in the row, right before the line terminator.
+                entries.append((row[0], partition_number(name), position - len(LINE_END) - SLOT_SIZE))
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+
+        # Keep the dates and the number of rows of the partition and whether its rows are still sorted by date.
+        dates = [row[4] for row in group]
+        info = manifest.get(name)
+        ordered = is_sorted(dates)
+        if info is not None:
+            ordered = ordered and info['sorted'] and info['last date'] <= dates[0]
+            dates += [info['first date'], info['last date']]
+        manifest[name] = {'first date': min(dates), 'last date': max(dates),
+                          'rows': len(group) + (info['rows'] if info is not None else 0), 'sorted': ordered}
+
+    write_manifest(manifest)
+    add_to_index(entries, sync)
+
+
+def add_to_index(entries, sync=False):
+    """
+    The function saves partitions and offsets of departure of new attendances to the index file.
+    :param entries: a list of tuples (attendance id, partition number, offset)
+    :param sync: if True, we wait until the index is really on the disk (fsync)
+    """
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    with open(INDEX_FILE, 'r+b' if os.path.isfile(INDEX_FILE) else 'wb') as index:
+        for attendance_id, number, slot in entries:
+            index.seek((int(attendance_id) - 1) * INDEX_RECORD.size)
+            index.write(INDEX_RECORD.pack(number, slot))
+        if sync:
+            index.flush()
+            os.fsync(index.fileno())
+
+
+def rebuild_index():
+    """
+    The function scans all partitions once and writes down, where departure of every attendance is.
+    We call it if the index file is lost or doesn't match partitions anymore.
+    """
+    entries = []
+    for name in read_manifest():
+        try:
+            with open(partition_path(name), 'rb') as file:
+                file.readline()  # Skip the header.
+                position = file.tell()
+                for line in file:
+                    attendance_id = line.split(b';', 1)[0]
+                    if attendance_id.strip():
+                        slot = position + len(line.rstrip(LINE_END)) - SLOT_SIZE
+                        entries.append((int(attendance_id), partition_number(name), slot))
+                    position += len(line)
+        except FileNotFoundError:
+            pass
+    if os.path.isfile(INDEX_FILE):
+        os.remove(INDEX_FILE)
+    add_to_index(entries)
+
+
+def find_departure_slot(attendance_id):
+    """
+    The function finds departure columns of the given attendance.
+    :param attendance_id: id of the attendance
+    :return: a tuple (partition, offset in bytes) or None, if the index doesn't know about this attendance
+    """
+    return find_departure_slots([attendance_id])[0]
+
+
+def find_departure_slots(attendance_ids):
+    """
+    The function finds departure columns of many attendances, opening the index only once.
+    :param attendance_ids: ids of attendances
+    :return: a list of tuples (partition, offset in bytes) or None for attendances the index doesn't know about
+    """
+    for attempt in range(2):  # If the index is missing or too short, we rebuild it once and look again.
+        found = []
+        missing = False
+        index = open(INDEX_FILE, 'rb') if os.path.isfile(INDEX_FILE) else None
+        try:
+            for attendance_id in attendance_ids:
+                position = (int(attendance_id) - 1) * INDEX_RECORD.size
+                record = b''
+                if index is not None and position >= 0:
+                    index.seek(position)
+                    record = index.read(INDEX_RECORD.size)
+                if len(record) == INDEX_RECORD.size and INDEX_RECORD.unpack(record)[0]:
+                    number, slot = INDEX_RECORD.unpack(record)
+                    found.append((partition_name(number), slot))
+                else:
+                    found.append(None)
+                    missing = missing or position >= 0
+        finally:
+            if index is not None:
+                index.close()
+        if not missing or attempt == 1:
+            return found
+        rebuild_index()
+
+
+def set_departure(attendance_id, departure_date, departure_time):
+    """
+    The function writes departure to the given attendance. Usually it writes it right over the reserved place.
+    If it can't (the index is out of date or the row was written without reserved place), it rewrites the partition
+    with this attendance.
+    """
+    departure = (departure_date + ';' + departure_time).encode()
+    found = find_departure_slot(attendance_id)
+    if found is not None and len(departure) == SLOT_SIZE:
+        name, slot = found
+        with open(partition_path(name), 'r+b') as file:
+            file.seek(slot)
+            if file.read(SLOT_SIZE) == OPEN_SLOT:  # Make sure the index isn't out of date.
+                file.seek(slot)
+                file.write(departure)
+                return
+
+    # Otherwise we look for the partition with this attendance, starting from the one the index knows about.
+    names = list(read_manifest())
+    if found is not None and found[0] in names:
+        names.remove(found[0])
+        names.insert(0, found[0])
+    for name in names:
+        data = read_partition(name)
+        row_to_change = [row for row in data if row['attendance id'] == str(attendance_id)]
+        if row_to_change:
+            row_to_change[0]['departure date'] = departure_date
+            row_to_change[0]['departure time'] = departure_time
+            rewrite_partition(name, [[value for value in item.values()] for item in data])
+            rebuild_index()  # Rows have moved, so offsets have changed too.
+            return
+
+
+def set_departures(departures):
+    """
+    The function writes departures to many attendances at once. It opens the index and every partition only once
+    and writes reserved places in the order they are in the file.
+    :param departures: a list of tuples (attendance id, departure date, departure time)
+    """
+    groups = {}
+    rest = []  # departures we can't write over reserved places
+    places = find_departure_slots([item[0] for item in departures])
+    for item, place in zip(departures, places):
+        departure = (item[1] + ';' + item[2]).encode()
+        if place is None or len(departure) != SLOT_SIZE:
+            rest.append(item)
+        else:
+            groups.setdefault(place[0], []).append((place[1], departure, item))
+
+    for name, items in groups.items():
+        with open(partition_path(name), 'r+b') as file:
+            for slot, departure, item in sorted(items):
+                file.seek(slot)
+                if file.read(SLOT_SIZE) == OPEN_SLOT:  # Make sure the index isn't out of date.
+                    file.seek(slot)
+                    file.write(departure)
+                else:
+                    rest.append(item)
+
+    for item in rest:
+        set_departure(*item)
+
+
+def rewrite_partition(name, rows):
+    """
+    The function writes all rows of the partition to the temp file and puts it instead of the old one in one step.
+    """
+    with atomic_write(partition_path(name)) as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(pad_departure(row))
+
+
+def migrate_legacy_file():
+    """
+    The function moves attendance from the single attendance file of older versions to partitions. It does it only
+    once: when the file exists and there are no partitions yet. The old file is kept with '.bak' extension.
+    """
+    if not os.path.isfile(LEGACY_FILE) or os.path.isfile(MANIFEST_FILE):
+        return
+    with open(LEGACY_FILE, 'r', newline='') as file:
+        reader = csv.DictReader(file, delimiter=';', dialect='excel', skipinitialspace=True)
+        rows = [convert_row([row[field] for field in FIELDS]) for row in reader]
+    append_rows(rows)
+    os.replace(LEGACY_FILE, LEGACY_FILE + '.bak')
+
+
+def convert_row(row):
+    """
+    The function converts dates of the attendance row from 'dd/mm/YYYY' of older versions to 'YYYY-MM-DD'.
+    :param row: a list of values in the order of columns
+    :return: the same list
+    """
+    for index in (4, 6):
+        if is_old_date(row[index]):
+            row[index] = to_iso(row[index])
+    return row
+
+
+def has_old_dates():
+    """
+    The function says whether partitions still have dates of older versions. It looks only at the manifest.
+    """
+    return any(is_old_date(info['first date']) for info in read_manifest().values())
+
+
+def convert_dates():
+    """
+    The function converts dates of all partitions from 'dd/mm/YYYY' of older versions to 'YYYY-MM-DD' and sorts rows
+    of every partition by arrival date. Partitions which are converted and sorted already stay as they are.
+    :return: the number of converted rows
+    """
+    count = 0
+    changed = False
+    for name, info in read_manifest().items():
+        rows = [[row[field] for field in FIELDS] for row in read_partition(name)]
+        old = [row for row in rows if is_old_date(row[4]) or is_old_date(row[6])]
+        if not old and info['sorted']:
+            continue
+        for row in old:
+            convert_row(row)
+        rows.sort(key=lambda row: row[4])  # The sort is stable, so rows of one day keep their order.
+        rewrite_partition(name, rows)
+        count += len(old)
+        changed = True
+    if changed:
+        rebuild_manifest()
+        rebuild_index()  # Rows have moved, so offsets have changed too.
+    return count
@@ -0,0 +1,110 @@
+"""
+This module finds attendance of employees for reports.
+
+A query joins employees and attendance by employee id with a hash join: first it picks employees we need from the
+registry (by statuses through its index and by ids) into a dictionary, then it reads attendance once and keeps a row
+only if its employee is in this dictionary. So every row costs one dictionary lookup, however many employees we need.
+
+Besides statuses and ids, a query filters attendance by arrival dates (csv storage reads only partitions of these
+months) and by arrival and departure times. Results are yielded one by one, so a report never keeps all of them
+in memory if it doesn't need to.
+"""
+
+from collections import namedtuple
+
+import config
+from employee import registry
+from storage import get_storage
+
+
+# One row of the result: the employee and his attendance.
+AttendanceRow = namedtuple('AttendanceRow', ['employee_id', 'first_name', 'last_name', 'status', 'attendance_id',
+                                             'arrival_date', 'arrival_time', 'departure_date', 'departure_time'])
+
+# Columns of attendance the query reads.
+COLUMNS = ['attendance id', 'employee id', 'arrival date', 'arrival time', 'departure date', 'departure time']
+
+
+def normal_time(text):
+    """
+    The function pads time 'H:MM' to 'HH:MM', so times can be compared as strings.
+    """
+    return text.zfill(5)
+
+
+def late_after(status):
+    """
+    The function returns time 'HH:MM' after which an employee with the given status is late (see config.py).
+    """
+    return normal_time(config.LATE_AFTER_BY_STATUS.get(status, config.LATE_AFTER))
+
+
+class Query:
+    """
+    The query of attendance of employees. All filters are optional:
+    - statuses - employees with these statuses only;
+    - employee_ids - employees with these ids only;
+    - start, end - arrival dates (datetime.date, both included);
+    - arrived_after, arrived_before - arrival time 'HH:MM' (not included);
+    - departed_after, departed_before - departure time 'HH:MM' (not included), open attendances are skipped;
+    - late - only arrivals after the time of the employee's status (see late_after()).
+    Employees are taken from the registry of the program or from the given one, e.g. its snapshot for a report in
+    another thread (see Registry.snapshot()).
+    """
+
+    def __init__(self, statuses=None, employee_ids=None, start=None, end=None, arrived_after=None, arrived_before=None,
+                 departed_after=None, departed_before=None, late=False, employees=None):
+        self.registry = registry if employees is None else employees
+        self.statuses = statuses
+        self.employee_ids = employee_ids
+        self.start = start
+        self.end = end
+        self.arrived_after = normal_time(arrived_after) if arrived_after is not None else None
+        self.arrived_before = normal_time(arrived_before) if arrived_before is not None else None
+        self.departed_after = normal_time(departed_after) if departed_after is not None else None
+        self.departed_before = normal_time(departed_before) if departed_before is not None else None
+        self.late = late
+
+    def employees(self):
+        """
+        Method returns records of employees who match the query sorted by id.
+        """
+        if self.statuses is not None:
+            records = self.registry.with_statuses(self.statuses)
+        else:
+            records = sorted(self.registry, key=lambda record: record.id)
+        if self.employee_ids is not None:
+            ids = {int(i) for i in self.employee_ids}
+            records = [record for record in records if record.id in ids]
+        return records
+
+    def attendance(self):
+        """
+        The generator yields AttendanceRow for every attendance which matches the query in the order of attendance.
+        """
+        # The build side of the join: {employee id as in attendance data: (record, time after which he is late)}.
+        chosen = {str(record.id): (record, late_after(record.status)) for record in self.employees()}
+        if not chosen:
+            return
+
+        rows = get_storage().iter_attendance(COLUMNS, predicate=lambda row: row[1] in chosen, start=self.start,
+                                             end=self.end)
+        for attendance_id, employee_id, arrival_date, arrival_time, departure_date, departure_time in rows:
+            record, late_time = chosen[employee_id]
+            arrival = normal_time(arrival_time)
+            if self.late and arrival <= late_time:
+                continue
+            if self.arrived_after is not None and arrival <= self.arrived_after:
+                continue
+            if self.arrived_before is not None and arrival >= self.arrived_before:
+                continue
+            if self.departed_after is not None or self.departed_before is not None:
+                if departure_time == 'None':
+                    continue
+                departure = normal_time(departure_time)
+                if self.departed_after is not None and departure <= self.departed_after:
+                    continue
+                if self.departed_before is not None and departure >= self.departed_before:
+                    continue
+            yield AttendanceRow(record.id, record.first_name, record.last_name, record.status, attendance_id,
+                                arrival_date, arrival_time, departure_date, departure_time)
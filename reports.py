@@ -0,0 +1,176 @@
+"""
+This module finds employees who come late. It needs numpy.
+
+Arrival times are turned into minutes since midnight once, for all attendances together, and late arrivals are found
+with numpy boolean masks instead of parsing and comparing times row by row. An employee is late if he comes after
+the time of his status (config.LATE_AFTER_BY_STATUS) or, if his status hasn't its own time, after config.LATE_AFTER.
+
+Besides late rows, the report counts for every employee his arrivals, late arrivals and minutes he was late.
+The GUI report of late employees picks late rows through iter_late() too.
+
+To print the report for all attendance run:
+    python reports.py [from date] [to date]
+    python reports.py columns
+The second one uses the columnar copy of attendance (see columnar.py).
+"""
+
+import sys
+from itertools import compress, islice
+from collections import namedtuple
+
+import numpy as np
+
+import config
+import columnar
+from employee import registry, load_employees
+from storage import get_storage
+from dates import read_date
+
+
+# Lateness of one employee: numbers of arrivals and late arrivals and the sum of minutes he was late.
+Lateness = namedtuple('Lateness', ['arrivals', 'late', 'late_minutes'])
+
+PORTION = 10000  # rows which iter_late() checks at once
+
+
+def to_minutes(times):
+    """
+    The function converts times 'HH:MM' (or 'H:MM') to minutes since midnight, all of them at once.
+    :param times: a list or an array of times
+    :return: an array of minutes
+    """
+    times = np.asarray(times, dtype='U5')
+    if times.size == 0:
+        return np.zeros(0, dtype=np.int16)
+    times = np.char.rjust(times, 5, '0')
+    digits = times.astype('S5').view(np.uint8).reshape(-1, 5).astype(np.int16) - ord('0')
+    return (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 3] * 10 + digits[:, 4]
+
+
+class Arrivals:
+    """
+    Arrivals as two arrays of the same length: employee ids and arrival minutes. Statuses of employees are taken
+    from the registry of the program or from the given one (e.g. its snapshot for a report in another thread).
+    """
+
+    def __init__(self, employee_ids, minutes, employees=None):
+        self.employee_ids = np.asarray(employee_ids, dtype=np.int32)
+        self.minutes = np.asarray(minutes, dtype=np.int16)
+        self.registry = registry if employees is None else employees
+
+    @classmethod
+    def from_rows(cls, rows, employee_index=0, time_index=1, employees=None):
+        """
+        Method takes arrivals from rows of attendance (tuples of strings).
+        :param rows: a list of rows
+        :param employee_index: the place of employee id in a row
+        :param time_index: the place of arrival time in a row
+        """
+        employee_ids = np.array([row[employee_index] for row in rows]).astype(np.int32)
+        return cls(employee_ids, to_minutes([row[time_index] for row in rows]), employees)
+
+    @classmethod
+    def from_storage(cls, start=None, end=None):
+        """
+        Method reads arrivals between given dates (datetime.date, both included) from the storage.
+        """
+        return cls.from_rows(list(get_storage().iter_attendance(['employee id', 'arrival time'], start=start,
+                                                                end=end)))
+
+    @classmethod
+    def from_columns(cls, directory=columnar.COLUMN_DIR):
+        """
+        Method takes arrivals from the columnar copy of attendance, where minutes are counted already.
+        """
+        data = columnar.load(['employee_id', 'arrival_minute'], directory)
+        return cls(data['employee_id'], data['arrival_minute'])
+
+    def size(self):
+        """
+        Method returns the length of lookup arrays by employee id: every employee of the registry and of arrivals
+        has his place there.
+        """
+        biggest = int(self.employee_ids.max()) if len(self.employee_ids) else 0
+        return max(biggest, self.registry.last_id()) + 1
+
+    def thresholds(self, late_after=None, by_status=None):
+        """
+        Method returns an array: the time in minutes, after which an employee is late, for every employee id.
+        :param late_after: time 'HH:MM' for statuses which haven't their own time, config.LATE_AFTER if None
+        :param by_status: a dictionary {status: time 'HH:MM'}, config.LATE_AFTER_BY_STATUS if None
+        """
+        late_after = config.LATE_AFTER if late_after is None else late_after
+        by_status = config.LATE_AFTER_BY_STATUS if by_status is None else by_status
+        result = np.full(self.size(), to_minutes([late_after])[0], dtype=np.int16)
+        for status, limit in by_status.items():
+            ids = list(self.registry.ids_with_statuses([status]))
+            if ids:
+                result[ids] = to_minutes([limit])[0]
+        return result
+
+    def chosen(self, statuses=None):
+        """
+        Method returns a mask of arrivals of employees with given statuses, of all arrivals if statuses are None.
+        """
+        if statuses is None:
+            return np.ones(len(self.employee_ids), dtype=bool)
+        is_chosen = np.zeros(self.size(), dtype=bool)
+        is_chosen[list(self.registry.ids_with_statuses(statuses))] = True
+        return is_chosen[self.employee_ids]
+
+    def late(self, statuses=None, late_after=None, by_status=None):
+        """
+        Method returns a mask of late arrivals of employees with given statuses (all employees if None).
+        """
+        return self.chosen(statuses) & (self.minutes > self.thresholds(late_after, by_status)[self.employee_ids])
+
+    def lateness(self, statuses=None, late_after=None, by_status=None):
+        """
+        Method counts arrivals, late arrivals and late minutes for every employee with given statuses
+        (all employees if None) who has arrivals.
+        :return: a dictionary {employee id: Lateness}
+        """
+        size = self.size()
+        chosen = self.chosen(statuses)
+        thresholds = self.thresholds(late_after, by_status)[self.employee_ids]
+        late = chosen & (self.minutes > thresholds)
+
+        arrivals = np.bincount(self.employee_ids[chosen], minlength=size)
+        late_count = np.bincount(self.employee_ids[late], minlength=size)
+        late_minutes = np.bincount(self.employee_ids[late], weights=(self.minutes - thresholds)[late], minlength=size)
+        return {int(employee_id): Lateness(int(arrivals[employee_id]), int(late_count[employee_id]),
+                                           int(late_minutes[employee_id]))
+                for employee_id in np.flatnonzero(arrivals)}
+
+
+def iter_late(rows, employee_index=0, time_index=1, employees=None):
+    """
+    The generator yields only rows of late arrivals from the given rows. It takes PORTION of rows at once and finds
+    late ones among them with numpy, so it never keeps all rows in memory.
+    :param rows: rows of attendance (tuples)
+    :param employee_index: the place of employee id in a row
+    :param time_index: the place of arrival time in a row
+    :param employees: the registry with statuses of employees, the registry of the program if None
+    """
+    rows = iter(rows)
+    while True:
+        portion = list(islice(rows, PORTION))
+        if not portion:
+            return
+        yield from compress(portion, Arrivals.from_rows(portion, employee_index, time_index, employees).late())
+
+
+if __name__ == '__main__':
+    load_employees()
+    get_storage().prepare()  # Data of older versions is moved to the storage on the first start.
+    if len(sys.argv) == 2 and sys.argv[1] == 'columns':
+        arrivals = Arrivals.from_columns()
+    else:
+        dates = [read_date(argument) for argument in sys.argv[1:3]]
+        arrivals = Arrivals.from_storage(*dates)
+
+    print('{:>5}  {:<25} {:>8} {:>5} {:>12}'.format('id', 'name', 'arrivals', 'late', 'late minutes'))
+    for employee_id, result in sorted(arrivals.lateness().items()):
+        employee = registry.get(employee_id)
+        name = employee.first_name + ' ' + employee.last_name if employee is not None else '(deleted)'
+        print('{:>5}  {:<25} {:>8} {:>5} {:>12}'.format(employee_id, name, *result))
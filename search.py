@@ -0,0 +1,109 @@
+"""
+This module finds employees by the beginning of their first name, last name or id, while user types it.
+
+The prefix index is a sorted list of keys (every word of names in lower case and ids) with ids of employees. All keys
+which begin with the typed text lie together in this list, so we find them by binary search and don't look at every
+employee. If user types several words, e.g. 'ann smi', every word has to begin some key of the employee.
+
+The registry builds the index once and changes it together with employees (see Registry in employee.py).
+"""
+
+from heapq import nsmallest
+from bisect import bisect_left, insort
+
+
+MATCHES = 10  # how many employees the search returns
+FEW_CHANGES = 32  # so many keys are put to or taken from their places one by one, more of them - in one pass
+
+
+def keys_of(record):
+    """
+    The function returns keys of the employee in the index: his id and words of his names in lower case.
+    """
+    keys = {str(record.id)}
+    for name in (record.first_name, record.last_name):
+        keys.update(name.lower().split())
+    return keys
+
+
+class PrefixIndex:
+    """
+    The index of employees by prefixes of their keys: a sorted list of tuples (key, employee id) and records of
+    employees {id: EmployeeRecord}.
+    """
+
+    def __init__(self, records):
+        self.records = {record.id: record for record in records}
+        self.entries = sorted((key, record.id) for record in self.records.values() for key in keys_of(record))
+
+    def add(self, records):
+        """
+        Method adds the given employees to the index.
+        """
+        records = list(records)
+        entries = [(key, record.id) for record in records for key in keys_of(record)]
+        for record in records:
+            self.records[record.id] = record
+        if len(entries) <= FEW_CHANGES:
+            for entry in entries:
+                insort(self.entries, entry)
+        else:  # Sorting of two sorted parts is quick, so many entries are added at once.
+            entries.sort()
+            self.entries.extend(entries)
+            self.entries.sort()
+
+    def remove(self, records):
+        """
+        Method removes the given employees from the index.
+        """
+        records = list(records)
+        for record in records:
+            self.records.pop(record.id, None)
+        if sum(len(keys_of(record)) for record in records) <= FEW_CHANGES:
+            for record in records:
+                for key in keys_of(record):
+                    entry = (key, record.id)
+                    position = bisect_left(self.entries, entry)
+                    if position < len(self.entries) and self.entries[position] == entry:
+                        del self.entries[position]
+        else:
+            ids = {record.id for record in records}
+            self.entries = [entry for entry in self.entries if entry[1] not in ids]
+
+    def with_prefix(self, prefix):
+        """
+        The generator yields ids of employees who have a key beginning with the prefix, in the order of keys.
+        An employee may be yielded more than once.
+        """
+        # We walk from the first key with the prefix by positions, a slice would copy the rest of the index.
+        entries = self.entries
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries):
+            key, employee_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            yield employee_id
+            position += 1
+
+    def search(self, text, limit=MATCHES):
+        """
+        Method returns records of at most limit employees who match the typed text. If the text is empty,
+        it returns employees with the smallest ids.
+        """
+        words = text.lower().split()
+        if not words:
+            return [self.records[i] for i in nsmallest(limit, self.records)]
+
+        result, seen = [], set()
+        for employee_id in self.with_prefix(words[0]):
+            if employee_id in seen:
+                continue
+            seen.add(employee_id)
+            record = self.records[employee_id]
+            # Other words have to match keys of the same employee.
+            keys = keys_of(record)
+            if all(any(key.startswith(word) for key in keys) for word in words[1:]):
+                result.append(record)
+                if len(result) == limit:
+                    break
+        return result
@@ -0,0 +1,371 @@
+"""
+This module is the check-in service: badge readers and other programs mark arrivals and departures through HTTP,
+without the GUI.
+
+The service keeps employees and open attendances in memory and answers at once. New arrivals and departures are
+collected and a background task writes them to the storage every few seconds (config.SERVICE_FLUSH_SECONDS) in its
+own thread, so slow disks don't stop check-ins. The service is the only program which writes attendance while it
+works, other programs have to send check-ins to it. So it doesn't start, if several programs share the data
+(config.SHARED): it gives attendance ids without asking the storage, and kiosks would give the same ids.
+
+Requests (bodies and answers are JSON):
+    POST /arrival       {"employee_id": 3}              - the employee has come, date and time are optional:
+                        {"employee_id": 3, "date": "18/10/2026", "time": "09:05"}
+                                                          (dates are 'dd/mm/YYYY' or 'YYYY-MM-DD')
+    POST /departure     {"employee_id": 3}              - the employee has gone
+    GET  /roster                                        - all employees and whether they are at work,
+    GET  /roster?status=manager                           only employees with the given status
+    GET  /roster/3                                      - one employee
+    GET  /stats                                         - numbers of check-ins and writes
+
+To start the service run:
+    python service.py [port]
+"""
+
+import sys
+import json
+import time
+import signal
+import asyncio
+import datetime
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import dates
+from employee import registry, load_employees
+from attendance import attendance, load_attendance_state, close_forgotten_session
+from storage import get_storage
+from worktime import worked_minutes
+
+
+class CheckInError(Exception):
+    """
+    The exception is raised when a check-in can't be done. It keeps the HTTP status of the answer.
+    """
+
+    def __init__(self, status, message):
+        self.status = status
+        super().__init__(message)
+
+
+class CheckInService:
+    """
+    Arrivals, departures and the roster in memory. Methods don't touch the storage, flush() writes everything
+    collected since the last call.
+    """
+
+    def __init__(self):
+        self.rows = {}  # arrivals which aren't written yet {attendance id: row}
+        self.departures = []  # departures of written attendances (attendance id, date, time)
+        self.worked = []  # closed attendances for the table of worked time
+        self.counters = {'arrivals': 0, 'departures': 0, 'flushes': 0, 'written': 0, 'flush seconds': 0.0}
+
+    def arrival(self, employee_id, date=None, time_=None):
+        """
+        Method marks the arrival of the employee. If date or time aren't given, it takes them from the clock.
+        If the employee hasn't marked his departure on an earlier date, that attendance is closed first.
+        :return: a dictionary with the new attendance
+        """
+        employee = self.find_employee(employee_id)
+        date, time_ = self.moment(date, time_)
+        session = attendance.open_session(employee.id)
+        if session is not None and session[1] >= date:  # He is at work since this date or a later one.
+            raise CheckInError(HTTPStatus.CONFLICT, 'The employee {} has arrived already on {}.'
+                               .format(employee.id, dates.to_user(session[1])))
+        forgotten = close_forgotten_session(employee.id, date)
+        if forgotten is not None:
+            self.close(employee.id, forgotten, forgotten[1], forgotten[2], 0)
+
+        attendance.last_id += 1
+        self.rows[attendance.last_id] = [attendance.last_id, employee.id, employee.first_name, employee.last_name,
+                                         date, time_, 'None', 'None']
+        attendance.open_sessions[str(employee.id)] = (attendance.last_id, date, time_)
+        self.counters['arrivals'] += 1
+        return {'attendance_id': attendance.last_id, 'employee_id': employee.id, 'date': dates.to_user(date),
+                'time': time_}
+
+    def departure(self, employee_id, date=None, time_=None):
+        """
+        Method marks the departure of the employee who is at work.
+        :return: a dictionary with the closed attendance
+        """
+        employee = self.find_employee(employee_id)
+        date, time_ = self.moment(date, time_)
+        session = attendance.open_sessions.pop(str(employee.id), None)
+        if session is None:
+            raise CheckInError(HTTPStatus.CONFLICT, 'The employee {} isn\'t at work.'.format(employee.id))
+
+        self.close(employee.id, session, date, time_, worked_minutes(session[1], session[2], date, time_))
+        self.counters['departures'] += 1
+        return {'attendance_id': session[0], 'employee_id': employee.id, 'date': dates.to_user(date),
+                'time': time_}
+
+    def close(self, employee_id, session, date, time_, minutes):
+        """
+        Method collects the departure of the open attendance, which is removed from the map of open attendances
+        already, and its worked time.
+        """
+        row = self.rows.get(session[0])
+        if row is not None:  # The attendance isn't written yet, so we just fill its departure.
+            row[6:8] = [date, time_]
+        else:
+            self.departures.append((session[0], date, time_))
+        self.worked.append((employee_id, session[1], minutes, 1))
+
+    def roster(self, status=None):
+        """
+        Method returns all employees (or employees with the given status) and whether they are at work.
+        """
+        employees = registry if status is None else registry.with_statuses([status])
+        return [self.describe(employee) for employee in employees]
+
+    def employee(self, employee_id):
+        """
+        Method returns the employee and his open attendance, if he is at work.
+        """
+        return self.describe(self.find_employee(employee_id))
+
+    def stats(self):
+        """
+        Method returns numbers of check-ins, collected and written rows and flushes.
+        """
+        result = dict(self.counters)
+        result['waiting'] = len(self.rows) + len(self.departures)
+        result['at work'] = len(attendance.open_sessions)
+        return result
+
+    def take_changes(self):
+        """
+        Method gives everything collected since the last call for writing: new rows, departures, worked time,
+        open attendances and the next attendance id. It's called in the thread of the event loop, so nobody changes
+        them meanwhile.
+        """
+        rows, departures, worked = list(self.rows.values()), self.departures, self.worked
+        self.rows, self.departures, self.worked = {}, [], []
+        return rows, departures, worked, dict(attendance.open_sessions), attendance.last_id + 1
+
+    def return_changes(self, rows, departures, worked):
+        """
+        Method takes back changes which couldn't be written, so we try to write them next time. They go before
+        everything collected since then.
+        """
+        self.rows = {**{row[0]: row for row in rows}, **self.rows}
+        self.departures = departures + self.departures
+        self.worked = worked + self.worked
+
+    def write_changes(self, rows, departures, worked, sessions, next_id):
+        """
+        Method writes changes taken by take_changes() to the storage. It's called in the writing thread.
+        """
+        if not rows and not departures and not worked:
+            return
+        started = time.perf_counter()
+        storage = get_storage()
+        with storage.transaction():
+            if rows:
+                storage.append_attendance(rows)
+            if departures:
+                storage.set_departures(departures)
+            if worked:
+                storage.add_worked_time(worked)
+            storage.save_open_sessions(sessions)
+            storage.set_next_id('attendance', next_id)
+            storage.flush()
+        self.counters['flushes'] += 1
+        self.counters['written'] += len(rows) + len(departures)
+        self.counters['flush seconds'] += time.perf_counter() - started
+
+    @staticmethod
+    def find_employee(employee_id):
+        """
+        Method finds the employee by his id: a JSON integer or a string of digits, not 2.9 or true.
+        """
+        if isinstance(employee_id, bool) or not isinstance(employee_id, (int, str)) or \
+                isinstance(employee_id, str) and not (employee_id.isascii() and employee_id.isdigit()):
+            raise CheckInError(HTTPStatus.BAD_REQUEST, 'Employee id has to be a number.')
+        employee = registry.get(employee_id)
+        if employee is None:
+            raise CheckInError(HTTPStatus.NOT_FOUND, 'There is no employee with number {} in the system.'
+                               .format(employee_id))
+        return employee
+
+    @staticmethod
+    def moment(date, time_):
+        """
+        Method checks the given date and time or takes them from the clock.
+        :return: date 'YYYY-MM-DD' and time 'HH:MM' for data files
+        """
+        today, now = dates.now()
+        try:
+            date = today if date is None else dates.read_date(date).isoformat()
+            time_ = now if time_ is None else \
+                datetime.datetime.strptime(time_, dates.TIME_FORMAT).strftime(dates.TIME_FORMAT)
+        except (AttributeError, TypeError, ValueError):
+            raise CheckInError(HTTPStatus.BAD_REQUEST, "Date has to be 'dd/mm/YYYY' and time 'HH:MM'.")
+        return date, time_
+
+    @staticmethod
+    def describe(employee):
+        result = employee._asdict()
+        session = attendance.open_session(employee.id)
+        result['at_work'] = session is not None
+        if session is not None:
+            result['attendance_id'], result['arrival_date'], result['arrival_time'] = session
+            result['arrival_date'] = dates.to_user(result['arrival_date'])
+        return result
+
+
+class Server:
+    """
+    A small HTTP/1.1 server on asyncio streams. Connections are kept alive, so a badge reader sends all its check-ins
+    through one connection.
+    """
+
+    def __init__(self, service, host=config.SERVICE_HOST, port=config.SERVICE_PORT,
+                 flush_seconds=config.SERVICE_FLUSH_SECONDS):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.flush_seconds = flush_seconds
+        self.writer = ThreadPoolExecutor(max_workers=1)  # the only thread which writes to the storage
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        flusher = asyncio.ensure_future(self.flush_regularly())
+        stop = asyncio.Event()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal_number, stop.set)
+            except NotImplementedError:  # Windows: Ctrl+C raises KeyboardInterrupt instead.
+                pass
+        print('The check-in service is listening on http://{}:{}/'.format(self.host, self.port))
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            flusher.cancel()
+            await self.flush()  # Write down the last check-ins before we stop.
+            print('The check-in service has stopped.')
+
+    async def flush_regularly(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self):
+        rows, departures, worked, sessions, next_id = self.service.take_changes()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.writer, self.service.write_changes,
+                                                             rows, departures, worked, sessions, next_id)
+        except Exception as err:  # e.g. the disk is full: keep check-ins in memory and try again later.
+            print('Check-ins are not written: {}'.format(err), file=sys.stderr)
+            self.service.return_changes(rows, departures, worked)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except CheckInError as err:  # We don't understand the client, so we answer and close the connection.
+                    await self.send(writer, err.status, {'error': str(err)}, False)
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, answer = self.answer(method, target, body)
+                await self.send(writer, status, answer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def send(writer, status, answer, keep_alive):
+        data = json.dumps(answer).encode()
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n'
+                     'Connection: {}\r\n\r\n'.format(status.value, status.phrase, len(data),
+                                                     'keep-alive' if keep_alive else 'close').encode() + data)
+        await writer.drain()
+
+    @staticmethod
+    async def read_request(reader, max_body=config.SERVICE_MAX_BODY):
+        """
+        Method reads one request. If the request is wrong, it raises CheckInError with the status of the answer.
+        :return: method, target, body and whether the connection stays open, or None if the client has gone
+        """
+        try:
+            line = await reader.readline()
+            if not line.strip():
+                return None
+            parts = line.decode('latin-1').split()
+            if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+                raise CheckInError(HTTPStatus.BAD_REQUEST, 'The request line has to be: method, target and version.')
+            method, target, version = parts
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:  # A line is longer than the limit of the reader.
+            raise CheckInError(HTTPStatus.BAD_REQUEST, 'The request line or a header is too long.')
+
+        length = headers.get('content-length', '0')
+        if not length.isdigit():
+            raise CheckInError(HTTPStatus.BAD_REQUEST, 'Content-Length has to be a number.')
+        length = int(length)
+        if length > max_body:
+            raise CheckInError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               'The body is longer than {} bytes.'.format(max_body))
+        body = await reader.readexactly(length) if length else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+        return method.upper(), target, body, keep_alive
+
+    def answer(self, method, target, body):
+        """
+        Method does what the request asks.
+        :return: HTTP status and a JSON-serializable answer
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip('/')
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if method == 'POST' and path in ('/arrival', '/departure'):
+                try:
+                    data = json.loads(body or b'{}')
+                except ValueError:
+                    data = None
+                if not isinstance(data, dict):
+                    raise CheckInError(HTTPStatus.BAD_REQUEST, 'The body has to be a JSON object.')
+                check_in = self.service.arrival if path == '/arrival' else self.service.departure
+                return HTTPStatus.OK, check_in(data.get('employee_id'), data.get('date'), data.get('time'))
+            if method == 'GET' and path == '/roster':
+                return HTTPStatus.OK, self.service.roster(query.get('status'))
+            if method == 'GET' and path.startswith('/roster/'):
+                return HTTPStatus.OK, self.service.employee(path[len('/roster/'):])
+            if method == 'GET' and path == '/stats':
+                return HTTPStatus.OK, self.service.stats()
+            raise CheckInError(HTTPStatus.NOT_FOUND, 'Unknown request {} {}.'.format(method, url.path))
+        except CheckInError as err:
+            return err.status, {'error': str(err)}
+
+
+if __name__ == '__main__':
+    if config.SHARED:
+        print('The check-in service has to be the only program which writes attendance, '
+              'it can\'t work with shared data (EAMS_SHARED=1).')
+        sys.exit(1)
+
+    load_employees()
+    load_attendance_state()
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else config.SERVICE_PORT
+    try:
+        asyncio.run(Server(CheckInService(), port=port).serve())
+    except KeyboardInterrupt:
+        pass
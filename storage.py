@@ -0,0 +1,778 @@
+"""
+This module describes where the system keeps its data.
+
+Employee and attendance modules don't open data files themselves. They ask the storage, which is chosen in config.py:
+- CsvStorage keeps employees in employees.csv and attendance in monthly partitions (see partitions.py);
+- SqliteStorage keeps everything in one SQLite database with indexes on employee id, arrival date and open
+  attendances.
+
+To move existing csv data to the database run:
+    python storage.py migrate [database file]
+
+To write all attendance to one csv file in the usual layout (e.g. for a spreadsheet) run:
+    python storage.py export <file>
+
+To convert dates of data of older versions ('dd/mm/YYYY') to 'YYYY-MM-DD' run (the program does it itself when it
+starts, see dates.py):
+    python storage.py migrate-dates
+"""
+
+import os
+import csv
+import sys
+import time
+import atexit
+import datetime
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import config
+import partitions
+import worktime
+from locking import FileLock, atomic_write
+from metadata import get_next_id, set_next_id, file_stamp
+from csvfile import read_csv, iter_rows
+
+
+EMPLOYEES_FILE = 'employees.csv'
+EMPLOYEE_FIELDS = ['id', 'first name', 'last name', 'status', 'phone', 'age']
+ATTENDANCE_FIELDS = partitions.FIELDS
+OPEN_SESSIONS_FILE = 'open_sessions.csv'  # employees who have come and haven't left yet
+LOCK_FILE = 'storage.lock'  # the lock of csv storage shared by all programs which use it
+
+
+class Storage:
+    """
+    The interface of the storage. Every kind of storage has all these methods.
+    Kinds of ids are 'employees' and 'attendance'.
+    """
+
+    def prepare(self):
+        """
+        Method prepares the storage when the program starts.
+        """
+
+    def transaction(self):
+        """
+        Method returns a context manager. Other programs which use the same storage can't change it inside the block,
+        so we can read something and change the storage according to it.
+        """
+        raise NotImplementedError
+
+    def load_employees(self):
+        """
+        Method returns all employees as lists of values in the order of EMPLOYEE_FIELDS.
+        """
+        raise NotImplementedError
+
+    def add_employees(self, rows):
+        """
+        Method adds new employees, rows are lists of values in the order of EMPLOYEE_FIELDS. It adds all of them
+        or nobody.
+        """
+        raise NotImplementedError
+
+    def delete_employees(self, ids, rest):
+        """
+        Method deletes employees with the given ids. Rest are all employees who stay in the system, storages which
+        keep employees in one file write them instead of the old file.
+        """
+        raise NotImplementedError
+
+    def append_attendance(self, rows, sync=False):
+        """
+        Method adds new attendances, rows are lists of values in the order of ATTENDANCE_FIELDS. If sync is True,
+        it returns only when they are really on the disk.
+        """
+        raise NotImplementedError
+
+    def set_departure(self, attendance_id, departure_date, departure_time):
+        """
+        Method writes departure to the given attendance.
+        """
+        raise NotImplementedError
+
+    def set_departures(self, departures):
+        """
+        Method writes departures to many attendances at once, departures are tuples
+        (attendance id, departure date, departure time).
+        """
+        for attendance_id, departure_date, departure_time in departures:
+            self.set_departure(attendance_id, departure_date, departure_time)
+
+    def flush(self):
+        """
+        Method writes down everything the storage has collected in memory.
+        """
+
+    def data_version(self):
+        """
+        Method returns the version of employees and attendance data: any value which changes every time somebody
+        changes them. Reports use it to see whether their old results are still right.
+        """
+        raise NotImplementedError
+
+    def iter_attendance(self, columns=None, predicate=None, start=None, end=None):
+        """
+        Method yields tuples with values of the given columns of attendances with arrival between given dates
+        (datetime.date, both included). Predicate is a function which takes a tuple of values and says whether
+        we need this row.
+        """
+        raise NotImplementedError
+
+    def read_attendance(self, start=None, end=None):
+        """
+        Method yields attendances with arrival between given dates (datetime.date, both included) as dictionaries
+        {name of the column: a piece of data}.
+        """
+        for values in self.iter_attendance(start=start, end=end):
+            yield dict(zip(ATTENDANCE_FIELDS, values))
+
+    def get_next_id(self, kind):
+        """
+        Method returns the next id of the given kind or None, if the storage doesn't know it.
+        """
+        raise NotImplementedError
+
+    def set_next_id(self, kind, next_id):
+        """
+        Method writes down the next id of the given kind.
+        """
+        raise NotImplementedError
+
+    def load_open_sessions(self):
+        """
+        Method returns open attendances {employee id: (attendance id, arrival date, arrival time)} or None,
+        if the storage doesn't know them.
+        """
+        raise NotImplementedError
+
+    def save_open_sessions(self, sessions):
+        """
+        Method writes down open attendances.
+        """
+        raise NotImplementedError
+
+    def add_worked_time(self, entries):
+        """
+        Method adds closed attendances to the table of worked time, entries are tuples
+        (employee id, arrival date, minutes, sessions).
+        """
+        raise NotImplementedError
+
+    def read_worked_time(self, employee_id, start=None, end=None):
+        """
+        Method returns worked time of the employee between given dates (datetime.date, both included):
+        {date: (minutes, sessions)}.
+        """
+        raise NotImplementedError
+
+    def replace_worked_time(self, entries):
+        """
+        Method puts the given table of worked time (tuples (employee id, date, minutes, sessions)) instead of
+        the old one.
+        """
+        raise NotImplementedError
+
+    def convert_dates(self):
+        """
+        Method converts dates of data of older versions from 'dd/mm/YYYY' to 'YYYY-MM-DD' (see dates.py).
+        :return: the number of converted attendances
+        """
+        raise NotImplementedError
+
+
+class CsvStorage(Storage):
+    """
+    The storage in csv files: employees.csv, monthly attendance partitions and small files with the next ids and open
+    attendances.
+    """
+
+    # Metadata keeps the next ids for these data files.
+    sources = {'employees': EMPLOYEES_FILE, 'attendance': partitions.PARTITION_DIR}
+
+    def __init__(self):
+        # Programs which change files hold the lock alone, programs which read them hold it together.
+        self.lock = FileLock(LOCK_FILE)
+        self.worked_time = worktime.WorkedTimeFile()
+
+    def prepare(self):
+        with self.lock.exclusive():
+            partitions.migrate_legacy_file()
+            if partitions.has_old_dates():
+                self.convert_dates()
+            elif not os.path.isfile(self.worked_time.file_name):
+                # Attendance written before the table of worked time (e.g. by older versions) is counted once.
+                self.count_worked_time()
+
+    def transaction(self):
+        return self.lock.exclusive()
+
+    def data_version(self):
+        # Every change of employees or attendance changes the size or the time of the last change of their files.
+        with self.lock.shared():
+            return file_stamp(EMPLOYEES_FILE), file_stamp(partitions.PARTITION_DIR)
+
+    def load_employees(self):
+        try:
+            with self.lock.shared():
+                return [list(values) for values in iter_rows(EMPLOYEES_FILE)]
+        except FileNotFoundError:
+            return []
+
+    def add_employees(self, rows):
+        # We write all rows through one file and if something goes wrong, we cut the file back to its old size,
+        # so there are all new employees in the file or nobody.
+        with self.lock.exclusive(), open(EMPLOYEES_FILE, 'a', newline='') as file:
+            size = file.tell()
+            is_new = size == 0
+            try:
+                writer = csv.writer(file, delimiter=';', dialect='excel')
+                if is_new:
+                    writer.writerow(EMPLOYEE_FIELDS)
+                writer.writerows(rows)
+                file.flush()
+            except BaseException:
+                file.truncate(size)
+                raise
+
+    def delete_employees(self, ids, rest):
+        # We write employees who stay to a temp file and put it instead of the old file in one step.
+        with self.lock.exclusive(), atomic_write(EMPLOYEES_FILE) as file:
+            writer = csv.writer(file, delimiter=';', dialect='excel')
+            writer.writerow(EMPLOYEE_FIELDS)
+            writer.writerows(rest)
+
+    def append_attendance(self, rows, sync=False):
+        with self.lock.exclusive():
+            partitions.append_rows(rows, sync)
+
+    def set_departure(self, attendance_id, departure_date, departure_time):
+        with self.lock.exclusive():
+            partitions.set_departure(attendance_id, departure_date, departure_time)
+
+    def set_departures(self, departures):
+        with self.lock.exclusive():
+            partitions.set_departures(departures)
+
+    def iter_attendance(self, columns=None, predicate=None, start=None, end=None):
+        # Every partition is read under its own short lock. A long report (maybe in another thread) works with rows
+        # without the lock, so kiosks write meanwhile.
+        return partitions.iter_rows(columns, predicate, start, end, hold=self.lock.shared)
+
+    def get_next_id(self, kind):
+        with self.lock.shared():
+            return get_next_id(self.sources[kind])
+
+    def set_next_id(self, kind, next_id):
+        with self.lock.exclusive():
+            set_next_id(self.sources[kind], next_id)
+
+    def load_open_sessions(self):
+        with self.lock.shared():
+            if not os.path.isfile(OPEN_SESSIONS_FILE):
+                return None
+            sessions = {}
+            for row in read_csv(OPEN_SESSIONS_FILE):
+                if 'arrival time' not in row:  # The file of an older version, we count open attendances again.
+                    return None
+                sessions[row['employee id']] = (int(row['attendance id']), row['arrival date'], row['arrival time'])
+            return sessions
+
+    def save_open_sessions(self, sessions):
+        with self.lock.exclusive(), atomic_write(OPEN_SESSIONS_FILE) as file:
+            writer = csv.writer(file, delimiter=';', dialect='excel')
+            writer.writerow(['employee id', 'attendance id', 'arrival date', 'arrival time'])
+            for employee_id, session in sessions.items():
+                writer.writerow([employee_id, *session])
+
+    def add_worked_time(self, entries):
+        with self.lock.exclusive():
+            self.worked_time.add(entries)
+
+    def read_worked_time(self, employee_id, start=None, end=None):
+        with self.lock.shared():
+            return self.worked_time.read(employee_id, start, end)
+
+    def replace_worked_time(self, entries):
+        with self.lock.exclusive():
+            self.worked_time.replace(entries)
+
+    def convert_dates(self):
+        with self.lock.exclusive():
+            partitions.migrate_legacy_file()  # The single file of older versions is converted on its way.
+            count = partitions.convert_dates()
+            # Open attendances and worked time are counted again from converted attendance.
+            if os.path.isfile(OPEN_SESSIONS_FILE):
+                os.remove(OPEN_SESSIONS_FILE)
+            self.count_worked_time()
+            return count
+
+    def count_worked_time(self):
+        with self.lock.exclusive():
+            self.worked_time.replace(worktime.count_worked_time(partitions.iter_rows(worktime.ATTENDANCE_COLUMNS)))
+
+
+class SqliteStorage(Storage):
+    """
+    The storage in one SQLite database. It works in WAL mode, so reports can read the database while kiosks write
+    to it. Every thread (e.g. report workers) has its own connection, so a report reads one snapshot of the database
+    while the GUI writes new attendances.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY,
+            first_name TEXT, last_name TEXT, status TEXT, phone TEXT, age TEXT
+        );
+        CREATE INDEX IF NOT EXISTS employees_status ON employees (status);
+
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY,
+            employee_id INTEGER NOT NULL,
+            first_name TEXT, last_name TEXT,
+            arrival_date TEXT, arrival_time TEXT,
+            departure_date TEXT, departure_time TEXT,
+            arrival_day TEXT  -- arrival date as YYYY-MM-DD, it was needed when dates were dd/mm/YYYY
+        );
+        CREATE INDEX IF NOT EXISTS attendance_employee ON attendance (employee_id);
+        CREATE INDEX IF NOT EXISTS attendance_day ON attendance (arrival_day);
+        CREATE INDEX IF NOT EXISTS attendance_open ON attendance (employee_id) WHERE departure_date = 'None';
+
+        CREATE TABLE IF NOT EXISTS worked_time (
+            employee_id INTEGER, day TEXT,  -- the day of arrival as YYYY-MM-DD
+            minutes INTEGER, sessions INTEGER,
+            PRIMARY KEY (employee_id, day)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS meta (
+            name TEXT PRIMARY KEY,
+            value INTEGER
+        );
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        # SQLite locks the database itself for every statement. Our lock keeps several statements of one transaction
+        # together. Busy statements wait for other programs up to the timeout.
+        self.lock = FileLock(file_name + '.lock')
+        self.local = threading.local()  # the connection of this thread
+        # The version of data is read through one connection of all threads, its data_version changes when any other
+        # connection (of other programs or of our threads) changes the database.
+        self.version_connection = sqlite3.connect(file_name, timeout=30, check_same_thread=False)
+        self.version_lock = threading.Lock()
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(self.SCHEMA)
+
+    @property
+    def connection(self):
+        """
+        The connection of the current thread, it's opened when the thread needs it first.
+        """
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = sqlite3.connect(self.file_name, timeout=30)
+        return connection
+
+    # The version of the database (PRAGMA user_version): 1 - dates are 'YYYY-MM-DD', 2 - worked time of attendance
+    # written before its table (e.g. by older versions) is counted.
+    VERSION = 2
+
+    def prepare(self):
+        with self.lock.exclusive():
+            version = self.version()
+            if version < 1:
+                self.convert_dates()
+            if version < 2:
+                self.replace_worked_time(worktime.count_worked_time(self.iter_attendance(worktime.ATTENDANCE_COLUMNS)))
+            if version < self.VERSION:
+                self.connection.execute('PRAGMA user_version = {}'.format(self.VERSION))
+
+    def version(self):
+        return self.connection.execute('PRAGMA user_version').fetchone()[0]
+
+    def transaction(self):
+        return self.lock.exclusive()
+
+    def data_version(self):
+        with self.version_lock:
+            return self.version_connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def load_employees(self):
+        cursor = self.connection.execute('SELECT id, first_name, last_name, status, phone, age FROM employees '
+                                         'ORDER BY id')
+        return [[str(row[0]), *row[1:]] for row in cursor]
+
+    def add_employees(self, rows):
+        with self.connection:
+            self.connection.executemany('INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?)',
+                                        [[int(row[0]), *[str(value) for value in row[1:]]] for row in rows])
+
+    def delete_employees(self, ids, rest):
+        with self.connection:
+            self.connection.executemany('DELETE FROM employees WHERE id = ?', [(int(i),) for i in ids])
+
+    def append_attendance(self, rows, sync=False):
+        # In WAL mode 'NORMAL' syncs the journal only at checkpoints, 'FULL' syncs it at every commit.
+        self.connection.execute('PRAGMA synchronous = {}'.format('FULL' if sync else 'NORMAL'))
+        with self.connection:
+            self.connection.executemany('INSERT INTO attendance VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                        [[int(row[0]), int(row[1]), *[str(value) for value in row[2:]], str(row[4])]
+                                         for row in rows])
+
+    def set_departure(self, attendance_id, departure_date, departure_time):
+        with self.connection:
+            self.connection.execute('UPDATE attendance SET departure_date = ?, departure_time = ? WHERE id = ?',
+                                    (departure_date, departure_time, int(attendance_id)))
+
+    def set_departures(self, departures):
+        with self.connection:
+            self.connection.executemany('UPDATE attendance SET departure_date = ?, departure_time = ? WHERE id = ?',
+                                        [(date, time, int(attendance_id)) for attendance_id, date, time in departures])
+
+    # Names of the columns of the attendance table.
+    ATTENDANCE_COLUMNS = dict(zip(ATTENDANCE_FIELDS, ['id', 'employee_id', 'first_name', 'last_name', 'arrival_date',
+                                                      'arrival_time', 'departure_date', 'departure_time']))
+
+    def iter_attendance(self, columns=None, predicate=None, start=None, end=None):
+        columns = ATTENDANCE_FIELDS if columns is None else columns
+        query = 'SELECT {} FROM attendance'.format(', '.join(self.ATTENDANCE_COLUMNS[name] for name in columns))
+        conditions, parameters = [], []
+        if start is not None:
+            conditions.append('arrival_day >= ?')
+            parameters.append(start.isoformat())
+        if end is not None:
+            conditions.append('arrival_day <= ?')
+            parameters.append(end.isoformat())
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        for row in self.connection.execute(query + ' ORDER BY id', parameters):
+            values = tuple(str(value) for value in row)
+            if predicate is None or predicate(values):
+                yield values
+
+    def get_next_id(self, kind):
+        row = self.connection.execute('SELECT value FROM meta WHERE name = ?', (kind,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_next_id(self, kind, next_id):
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (kind, next_id))
+
+    def load_open_sessions(self):
+        # The partial index attendance_open keeps only open attendances, so we don't read the history.
+        cursor = self.connection.execute("SELECT employee_id, id, arrival_date, arrival_time FROM attendance "
+                                         "WHERE departure_date = 'None' ORDER BY id")
+        return {str(employee_id): (attendance_id, arrival_date, arrival_time)
+                for employee_id, attendance_id, arrival_date, arrival_time in cursor}
+
+    def save_open_sessions(self, sessions):
+        pass  # The database knows open attendances itself.
+
+    def add_worked_time(self, entries):
+        with self.connection:
+            self.connection.executemany('INSERT INTO worked_time VALUES (?, ?, ?, ?) '
+                                        'ON CONFLICT (employee_id, day) DO UPDATE '
+                                        'SET minutes = minutes + excluded.minutes, '
+                                        'sessions = sessions + excluded.sessions',
+                                        self.worked_time_rows(entries))
+
+    def read_worked_time(self, employee_id, start=None, end=None):
+        query = 'SELECT day, minutes, sessions FROM worked_time WHERE employee_id = ?'
+        parameters = [int(employee_id)]
+        if start is not None:
+            query += ' AND day >= ?'
+            parameters.append(start.isoformat())
+        if end is not None:
+            query += ' AND day <= ?'
+            parameters.append(end.isoformat())
+        return {datetime.date.fromisoformat(day): (minutes, sessions)
+                for day, minutes, sessions in self.connection.execute(query, parameters)}
+
+    def replace_worked_time(self, entries):
+        with self.connection:
+            self.connection.execute('DELETE FROM worked_time')
+            self.connection.executemany('INSERT INTO worked_time VALUES (?, ?, ?, ?)', self.worked_time_rows(entries))
+
+    @staticmethod
+    def worked_time_rows(entries):
+        return [(int(employee_id), date, minutes, sessions) for employee_id, date, minutes, sessions in entries]
+
+    def convert_dates(self):
+        # 'dd/mm/YYYY' -> 'YYYY-MM-DD' by positions of its parts. Days of worked time are 'YYYY-MM-DD' already.
+        with self.connection:
+            count = self.connection.execute("SELECT COUNT(*) FROM attendance WHERE arrival_date LIKE '__/__/____'"
+                                            ).fetchone()[0]
+            for column in ('arrival_date', 'departure_date'):
+                self.connection.execute("UPDATE attendance SET {0} = substr({0}, 7, 4) || '-' || substr({0}, 4, 2) "
+                                        "|| '-' || substr({0}, 1, 2) WHERE {0} LIKE '__/__/____'".format(column))
+            self.connection.execute('PRAGMA user_version = {}'.format(max(self.version(), 1)))
+        return count
+
+
+class BufferedStorage(Storage):
+    """
+    The storage which collects new attendances in memory and writes them to another storage together (group commit),
+    so a morning rush doesn't open attendance files for every arrival. The next attendance id and open attendances
+    are written together with them.
+
+    Policies (see config.py):
+    - 'event' - every arrival is written and synced to the disk at once;
+    - 'batch' - arrivals are written when there are batch_size of them or the oldest one waits batch_seconds,
+      every batch is synced to the disk;
+    - 'os' - like 'batch', but without syncing, the operating system writes the data to the disk later.
+
+    Before reading attendance it writes what it has collected, so readers always see all data. If several programs
+    use the storage (config.SHARED), it also writes them at the end of every transaction.
+    """
+
+    POLICIES = ('event', 'batch', 'os')
+
+    def __init__(self, storage, policy='event', batch_size=50, batch_seconds=1.0, shared=False):
+        if policy not in self.POLICIES:
+            raise ValueError("Unknown write policy '{}'. Choose 'event', 'batch' or 'os'.".format(policy))
+        self.storage = storage
+        self.policy = policy
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.shared = shared  # if other programs use the storage too, every transaction ends with a flush
+        self.rows = {}  # collected attendances {attendance id: row}
+        self.next_ids = {}  # the next ids we have to write down {kind: next id}
+        self.sessions = None  # open attendances we have to write down
+        self.timer = None
+        self.changes = 0  # how many times we have changed data, collected rows aren't seen in the storage yet
+        self.lock = threading.RLock()  # the timer writes from its own thread
+        self.counters = {'flushes': 0, 'rows': 0, 'biggest batch': 0, 'seconds': 0.0, 'longest flush': 0.0}
+
+    def prepare(self):
+        self.storage.prepare()
+
+    @contextmanager
+    def transaction(self):
+        # Collected rows aren't seen by other programs, so with shared storage we write them before others go on.
+        with self.lock, self.storage.transaction():
+            yield
+            if self.shared:
+                self.flush()
+
+    def data_version(self):
+        with self.lock:
+            return self.changes, self.storage.data_version()
+
+    def load_employees(self):
+        return self.storage.load_employees()
+
+    def add_employees(self, rows):
+        with self.lock:
+            self.changes += 1
+            self.storage.add_employees(rows)
+
+    def delete_employees(self, ids, rest):
+        with self.lock:
+            self.changes += 1
+            self.storage.delete_employees(ids, rest)
+
+    def append_attendance(self, rows, sync=False):
+        with self.lock:
+            self.changes += 1
+            for row in rows:
+                self.rows[int(row[0])] = list(row)
+            if sync or self.policy == 'event' or len(self.rows) >= self.batch_size:
+                self.flush()
+            elif self.timer is None:
+                # The oldest collected row mustn't wait longer than batch_seconds.
+                self.timer = threading.Timer(self.batch_seconds, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def set_departure(self, attendance_id, departure_date, departure_time):
+        self.set_departures([(attendance_id, departure_date, departure_time)])
+
+    def set_departures(self, departures):
+        with self.lock:
+            self.changes += 1
+            written = []
+            for attendance_id, departure_date, departure_time in departures:
+                row = self.rows.get(int(attendance_id))
+                if row is not None:  # The attendance isn't written yet, so we just fill its departure.
+                    row[6:8] = [departure_date, departure_time]
+                else:
+                    written.append((attendance_id, departure_date, departure_time))
+            if written:
+                self.storage.set_departures(written)
+
+    def iter_attendance(self, columns=None, predicate=None, start=None, end=None):
+        self.flush()
+        return self.storage.iter_attendance(columns, predicate, start, end)
+
+    def get_next_id(self, kind):
+        with self.lock:
+            if kind in self.next_ids:
+                return self.next_ids[kind]
+        return self.storage.get_next_id(kind)
+
+    def set_next_id(self, kind, next_id):
+        with self.lock:
+            if kind == 'attendance' and self.rows:  # It's written together with collected attendances.
+                self.next_ids[kind] = next_id
+            else:
+                self.next_ids.pop(kind, None)
+                self.storage.set_next_id(kind, next_id)
+
+    def load_open_sessions(self):
+        with self.lock:
+            if self.sessions is not None:
+                return dict(self.sessions)
+        return self.storage.load_open_sessions()
+
+    def save_open_sessions(self, sessions):
+        with self.lock:
+            if self.rows:  # They are written together with collected attendances.
+                self.sessions = dict(sessions)
+            else:
+                self.sessions = None
+                self.storage.save_open_sessions(sessions)
+
+    def add_worked_time(self, entries):
+        with self.lock:
+            self.storage.add_worked_time(entries)
+
+    def read_worked_time(self, employee_id, start=None, end=None):
+        with self.lock:
+            return self.storage.read_worked_time(employee_id, start, end)
+
+    def replace_worked_time(self, entries):
+        with self.lock:
+            self.storage.replace_worked_time(entries)
+
+    def convert_dates(self):
+        with self.lock:
+            self.flush()
+            return self.storage.convert_dates()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.rows:
+                return
+            started = time.perf_counter()
+            rows = list(self.rows.values())
+            self.storage.append_attendance(rows, sync=self.policy != 'os')
+            self.rows = {}
+            if self.sessions is not None:
+                self.storage.save_open_sessions(self.sessions)
+                self.sessions = None
+            for kind, next_id in self.next_ids.items():
+                self.storage.set_next_id(kind, next_id)
+            self.next_ids = {}
+
+            seconds = time.perf_counter() - started
+            self.counters['flushes'] += 1
+            self.counters['rows'] += len(rows)
+            self.counters['biggest batch'] = max(self.counters['biggest batch'], len(rows))
+            self.counters['seconds'] += seconds
+            self.counters['longest flush'] = max(self.counters['longest flush'], seconds)
+
+    def stats(self):
+        """
+        Method returns counters of writes: number of flushes and written rows, the biggest and the average batch,
+        total, the longest and the average flush time in seconds.
+        """
+        with self.lock:
+            result = dict(self.counters)
+        flushes = result['flushes']
+        result['average batch'] = result['rows'] / flushes if flushes else 0
+        result['average flush'] = result['seconds'] / flushes if flushes else 0.0
+        return result
+
+
+def export_attendance(file_name):
+    """
+    The function exports all attendance from the storage to one file in the usual csv layout.
+    """
+    with open(file_name, 'w', newline='') as file:
+        writer = csv.writer(file, delimiter=';', dialect='excel')
+        writer.writerow(ATTENDANCE_FIELDS)
+        writer.writerows(get_storage().iter_attendance())
+
+
+_storage = None
+
+
+def get_storage():
+    """
+    The function returns the storage chosen in config.py. It's created only once. New attendances are written
+    to it through the buffer with the write policy from config.py.
+    """
+    global _storage
+    if _storage is None:
+        if config.STORAGE == 'sqlite':
+            storage = SqliteStorage(config.SQLITE_FILE)
+        elif config.STORAGE == 'csv':
+            storage = CsvStorage()
+        else:
+            raise ValueError("Unknown storage '{}'. Choose 'csv' or 'sqlite'.".format(config.STORAGE))
+        _storage = BufferedStorage(storage, config.WRITE_POLICY, config.BATCH_SIZE, config.BATCH_SECONDS,
+                                   config.SHARED)
+        atexit.register(_storage.flush)  # Don't lose collected arrivals when the program closes.
+    return _storage
+
+
+def migrate_to_sqlite(file_name=config.SQLITE_FILE):
+    """
+    The function copies all employees and attendance from csv files to the SQLite database.
+    :param file_name: the database file, it has to be new or empty
+    :return: numbers of copied employees and attendances
+    """
+    source = CsvStorage()
+    source.prepare()
+    target = SqliteStorage(file_name)
+
+    employees = source.load_employees()
+    target.add_employees(employees)
+
+    # Copy attendance in big portions, so we don't keep all of it in memory.
+    count = 0
+    portion = []
+    for values in source.iter_attendance():
+        portion.append(values)
+        if len(portion) == 10000:
+            target.append_attendance(portion)
+            count += len(portion)
+            portion = []
+    target.append_attendance(portion)
+    count += len(portion)
+
+    # Worked time is counted again from attendance, so the database is up to date.
+    target.replace_worked_time(worktime.count_worked_time(source.iter_attendance(worktime.ATTENDANCE_COLUMNS)))
+    target.connection.execute('PRAGMA user_version = {}'.format(target.VERSION))
+
+    # The next ids: from metadata if we know them, otherwise after the biggest ones.
+    for kind in ('employees', 'attendance'):
+        next_id = source.get_next_id(kind)
+        if next_id is None:
+            table = 'employees' if kind == 'employees' else 'attendance'
+            next_id = target.connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM ' + table).fetchone()[0]
+        target.set_next_id(kind, next_id)
+
+    return len(employees), count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'migrate':
+        database = sys.argv[2] if len(sys.argv) > 2 else config.SQLITE_FILE
+        employees_count, attendance_count = migrate_to_sqlite(database)
+        print('{} employees and {} attendances are copied to {}.'.format(employees_count, attendance_count, database))
+    elif len(sys.argv) == 3 and sys.argv[1] == 'export':
+        get_storage().prepare()
+        export_attendance(sys.argv[2])
+        print('Attendance is written to {}.'.format(sys.argv[2]))
+    elif len(sys.argv) == 2 and sys.argv[1] == 'migrate-dates':
+        print('Dates of {} attendances are converted.'.format(get_storage().convert_dates()))
+    else:
+        print('Usage: python storage.py migrate [database file]\n'
+              '       python storage.py export <file>\n'
+              '       python storage.py migrate-dates')
@@ -0,0 +1,176 @@
+"""
+This module tests the storage shared by several programs at once.
+
+It makes a new data directory, adds some employees and starts many processes. Like kiosks, every process checks
+arrivals and departures of random employees through the same functions as the GUI, and sometimes adds or deletes
+an employee. When all of them finish, it checks that nothing is lost or repeated:
+- attendance ids go 1, 2, 3... without gaps and repeats, and there is one attendance for every arrival;
+- every departure is written and every employee has at most one open attendance;
+- open attendances and the next ids which the storage keeps match the data;
+- every added employee is in the system exactly once and deleted ones aren't.
+
+To run the test:
+    python stress.py [processes] [actions of every process]
+The storage is chosen as usual (EAMS_STORAGE environment variable).
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import multiprocessing
+
+EMPLOYEES_COUNT = 20  # employees in the system before kiosks start
+
+
+def kiosk(directory, number, actions):
+    """
+    The function does the work of one kiosk in the given data directory.
+    :return: a dictionary with numbers of arrivals, departures and refused check-ins and ids of added and deleted
+        employees
+    """
+    # Programs modules read settings when they are imported, so we import them only here.
+    os.chdir(directory)
+    os.environ['EAMS_SHARED'] = '1'
+    from employee import registry, load_employees, refresh_employees, add_manually, delete_manually, person
+    from attendance import (attendance, load_attendance_state, refresh_attendance_state, add_arrival_to_system,
+                            add_departure_to_system, ArrivedAlreadyError, GoneAlreadyError)
+    from storage import get_storage
+    import dates
+
+    load_employees()
+    load_attendance_state()
+    storage = get_storage()
+    chance = random.Random(number)
+    result = {'arrivals': 0, 'departures': 0, 'rejected': 0, 'added': [], 'deleted': []}
+    for _ in range(actions):
+        date, time_ = dates.now()
+        if chance.random() < 0.05:
+            with storage.transaction():
+                add_manually('Kiosk', 'Worker', 'worker', '0500000000', '30')
+                result['added'].append(person.last_id)
+            continue
+        if chance.random() < 0.03 and len(result['deleted']) < len(result['added']):
+            employee_id = result['added'][len(result['deleted'])]
+            if delete_manually(employee_id) == 0:
+                result['deleted'].append(employee_id)
+            continue
+
+        # Like the GUI, we look at the employee without holding the storage, so another kiosk may mark him
+        # meanwhile. Then the writers find it inside their transaction and refuse.
+        refresh_employees()
+        refresh_attendance_state()
+        employee = chance.choice(list(registry))
+        try:
+            if attendance.open_session(employee.id) is None:
+                add_arrival_to_system(employee.id, employee.first_name, employee.last_name, date, time_)
+                result['arrivals'] += 1
+            else:
+                add_departure_to_system(None, date, time_, employee.id)
+                result['departures'] += 1
+        except (ArrivedAlreadyError, GoneAlreadyError):
+            result['rejected'] += 1
+    storage.flush()
+    return result
+
+
+def check(results):
+    """
+    The function checks data in the current directory after all kiosks.
+    :return: a list of problems, it's empty if everything is right
+    """
+    from storage import get_storage
+
+    storage = get_storage()
+    problems = []
+    arrivals = sum(result['arrivals'] for result in results)
+    departures = sum(result['departures'] for result in results)
+    added = [i for result in results for i in result['added']]
+    deleted = {i for result in results for i in result['deleted']}
+
+    rows = list(storage.iter_attendance(['attendance id', 'employee id', 'departure date']))
+    ids = sorted(int(attendance_id) for attendance_id, _, _ in rows)
+    if ids != list(range(1, len(ids) + 1)):
+        problems.append('Attendance ids have gaps or repeats.')
+    if len(ids) != arrivals:
+        problems.append('There are {} attendances for {} arrivals.'.format(len(ids), arrivals))
+    closed = sum(1 for _, _, departure_date in rows if departure_date != 'None')
+    if closed != departures:
+        problems.append('There are {} departures written of {}.'.format(closed, departures))
+
+    open_sessions = {}
+    for attendance_id, employee_id, departure_date in rows:
+        if departure_date == 'None':
+            if employee_id in open_sessions:
+                problems.append('The employee {} has several open attendances.'.format(employee_id))
+            open_sessions[employee_id] = int(attendance_id)
+    kept = {employee_id: session[0] for employee_id, session in (storage.load_open_sessions() or {}).items()}
+    if kept != open_sessions:
+        problems.append('Open attendances of the storage don\'t match the data.')
+    if storage.get_next_id('attendance') != len(ids) + 1:
+        problems.append('The next attendance id is {}, but there are {} attendances.'.format(
+            storage.get_next_id('attendance'), len(ids)))
+
+    employees = [int(row[0]) for row in storage.load_employees()]
+    if len(employees) != len(set(employees)):
+        problems.append('Some employees are repeated.')
+    if len(added) != len(set(added)):
+        problems.append('Several employees got the same id.')
+    expected = set(range(1, EMPLOYEES_COUNT + 1)) | set(added)
+    if set(employees) != expected - deleted:
+        problems.append('Employees don\'t match added and deleted ones.')
+    if storage.get_next_id('employees') != EMPLOYEES_COUNT + len(added) + 1:
+        problems.append('The next employee\'s id is {}, but {} employees were added.'.format(
+            storage.get_next_id('employees'), EMPLOYEES_COUNT + len(added)))
+    return problems
+
+
+def main(processes=8, actions=200):
+    """
+    The function runs the test and prints its result.
+    :return: True if the data is right
+    """
+    directory = tempfile.mkdtemp(prefix='attendance-stress-')
+    current = os.getcwd()
+    os.chdir(directory)
+    os.environ['EAMS_SHARED'] = '1'
+    try:
+        from storage import get_storage
+        from attendance import load_attendance_state
+
+        storage = get_storage()
+        storage.prepare()
+        storage.add_employees([[i, 'Employee', 'Number', 'worker', '0500000000', '30']
+                               for i in range(1, EMPLOYEES_COUNT + 1)])
+        storage.set_next_id('employees', EMPLOYEES_COUNT + 1)
+        load_attendance_state()
+
+        # Processes are started, not forked, so every kiosk is a new program, as it is in real life.
+        context = multiprocessing.get_context('spawn')
+        started = time.perf_counter()
+        with context.Pool(processes) as pool:
+            results = pool.starmap(kiosk, [(directory, number, actions) for number in range(processes)])
+        seconds = time.perf_counter() - started
+
+        problems = check(results)
+    finally:
+        os.chdir(current)
+
+    print('{} processes made {} actions in {:.2f} seconds ({:.0f} actions per second).'.format(
+        processes, processes * actions, seconds, processes * actions / seconds))
+    print('{} check-ins were refused, because other kiosks had marked the employee.'.format(
+        sum(result['rejected'] for result in results)))
+    if problems:
+        print('\n'.join(problems))
+        print('The data is kept in {}.'.format(directory))
+        return False
+    shutil.rmtree(directory)
+    print('Everything is right.')
+    return True
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    sys.exit(0 if main(*arguments) else 1)
@@ -0,0 +1,102 @@
+"""
+This module describes the table which shows long lists of employees or attendance on the GUI screen.
+
+The table doesn't put every row to the tree view. The tree view has only as many lines as are visible, and when user
+scrolls, we write other visible rows of the source (source[start:stop]) to the same lines. So the tree view is built
+at once whether there are ten rows or a hundred thousand. Only widgets are virtual: rows of reports are in memory
+already (they are kept by the cache of reports, see cache.py), so the table doesn't keep its own copies of them.
+"""
+
+from collections.abc import Sequence
+from tkinter import ttk, END
+
+
+WHEEL_ROWS = 3  # rows which one turn of the mouse wheel scrolls
+
+
+class VirtualTable:
+    """
+    The tree view with a scroll bar which shows rows of the source. The source is a sequence of rows: the table asks
+    only its length and slices source[start:stop]. Any other iterable is read to a tuple first.
+    """
+
+    def __init__(self, master, columns, source=(), height=8):
+        self.height = height
+        self.tree = ttk.Treeview(master, columns=columns, show='headings', height=height)
+        self.scroll_bar = ttk.Scrollbar(master, orient='vertical', command=self.yview)
+        self.tree.config(yscroll=self.scroll_bar.set)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>', '<Up>', '<Down>', '<Prior>', '<Next>'):
+            self.tree.bind(sequence, self.on_scroll)
+        self.items = []  # lines of the tree view
+        self.set_source(source)
+
+    def grid(self, row, column):
+        """
+        Method puts the tree view to the given cell of the master and the scroll bar to the right of it.
+        """
+        self.tree.grid(row=row, column=column)
+        self.scroll_bar.grid(row=row, column=column + 1, sticky='ns')
+
+    def set_source(self, source):
+        """
+        Method shows rows of another source from the first one.
+        """
+        self.source = source if isinstance(source, Sequence) else tuple(source)
+        self.top = 0  # the offset of the first visible row
+        self.render()
+
+    def __len__(self):
+        return len(self.source)
+
+    def rows(self, start, count):
+        """
+        Method returns count rows of the source from the offset start.
+        """
+        return self.source[start:start + count]
+
+    def render(self):
+        """
+        Method writes visible rows to lines of the tree view and moves the scroll bar.
+        """
+        total = len(self.source)
+        lines = min(self.height, total)
+        self.top = max(0, min(self.top, total - lines))
+
+        # The number of lines changes only if the source is shorter than the tree view.
+        while len(self.items) < lines:
+            self.items.append(self.tree.insert('', END, values=()))
+        while len(self.items) > lines:
+            self.tree.delete(self.items.pop())
+
+        for item, row in zip(self.items, self.rows(self.top, lines)):
+            self.tree.item(item, values=tuple(row))
+
+        if total:
+            self.scroll_bar.set(self.top / total, (self.top + lines) / total)
+        else:
+            self.scroll_bar.set(0.0, 1.0)
+
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
+
+    def yview(self, *args):
+        """
+        Method is called by the scroll bar: ('moveto', fraction) or ('scroll', number, 'units' or 'pages').
+        """
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.source))
+            self.render()
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]) * (self.height if args[2] == 'pages' else 1))
+
+    def on_scroll(self, event):
+        if event.keysym in ('Up', 'Down'):
+            self.scroll(-1 if event.keysym == 'Up' else 1)
+        elif event.keysym in ('Prior', 'Next'):
+            self.scroll(-self.height if event.keysym == 'Prior' else self.height)
+        elif event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll(-WHEEL_ROWS)
+        else:
+            self.scroll(WHEEL_ROWS)
+        return 'break'  # The tree view mustn't scroll its lines itself.
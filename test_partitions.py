@@ -0,0 +1,104 @@
+"""
+Checks of attendance partitions: the binary search by arrival date and departures written over reserved places.
+
+To run them:
+    python -m unittest test_partitions
+"""
+
+import os
+import random
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+
+import partitions
+
+
+# Names with letters which take more than one byte, so offsets in bytes and in characters differ.
+NAMES = [('Zoë', 'Ångström'), ('Łukasz', 'Żółw'), ('Иван', 'Петров'), ('Rina', 'Kharari'), ('José', 'Nuñez')]
+
+
+class PartitionsTest(unittest.TestCase):
+
+    def setUp(self):
+        # Partitions are kept next to the program, so every test works in its own directory.
+        self.old_directory = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+
+        # Three months of open attendances sorted by arrival date, some days have no attendance at all.
+        generator = random.Random(7)
+        self.rows = []
+        day = datetime.date(2024, 1, 1)
+        while day <= datetime.date(2024, 3, 31):
+            for _ in range(generator.choice([0, 0, 1, 2, 3])):
+                first_name, last_name = generator.choice(NAMES)
+                self.rows.append([len(self.rows) + 1, generator.randint(1, 20), first_name, last_name,
+                                  day.isoformat(), '09:{:02d}'.format(generator.randint(0, 59)), 'None', 'None'])
+            day += datetime.timedelta(days=1)
+        partitions.append_rows(self.rows)
+
+    def tearDown(self):
+        os.chdir(self.old_directory)
+        self.directory.cleanup()
+
+    def test_partitions_are_sorted(self):
+        manifest = partitions.read_manifest()
+        self.assertEqual(list(manifest), ['2024-01', '2024-02', '2024-03'])
+        self.assertTrue(all(info['sorted'] for info in manifest.values()))
+
+    def test_seek_date(self):
+        for name in partitions.read_manifest():
+            dates = [row[4] for row in self.rows if row[4].startswith(name)]
+            first = datetime.date.fromisoformat(name + '-01')
+            for day in (first + datetime.timedelta(days=offset) for offset in range(-1, 33)):
+                date = day.isoformat()
+                with open(partitions.partition_path(name), 'rb') as file:
+                    partitions.seek_date(file, date)
+                    line = file.readline()
+                later = [value for value in dates if value >= date]
+                if later:
+                    self.assertEqual(partitions.arrival_date_of(line), later[0], (name, date))
+                else:
+                    self.assertEqual(line, b'', (name, date))
+
+    def test_rows_between_dates(self):
+        columns = ['attendance id', 'first name', 'arrival date']
+        days = [datetime.date(2023, 12, 31), datetime.date(2024, 1, 1), datetime.date(2024, 1, 17),
+                datetime.date(2024, 1, 31), datetime.date(2024, 2, 1), datetime.date(2024, 2, 29),
+                datetime.date(2024, 3, 15), datetime.date(2024, 4, 1), None]
+        for start in days:
+            for end in days:
+                expected = [(str(row[0]), row[2], row[4]) for row in self.rows
+                            if (start is None or row[4] >= start.isoformat())
+                            and (end is None or row[4] <= end.isoformat())]
+                found = list(partitions.iter_rows(columns, start=start, end=end))
+                self.assertEqual(found, expected, (start, end))
+
+    def test_departures_in_place(self):
+        sizes = {name: os.path.getsize(partitions.partition_path(name)) for name in partitions.read_manifest()}
+        lines = {name: self.line_lengths(name) for name in sizes}
+
+        # One departure by one, the rest together. The partition mustn't be rewritten for any of them.
+        departures = [(row[0], row[4], '18:{:02d}'.format(row[0] % 60)) for row in self.rows]
+        with mock.patch.object(partitions, 'rewrite_partition', side_effect=AssertionError('rewritten')):
+            for item in departures[:10]:
+                partitions.set_departure(*item)
+            partitions.set_departures(departures[10:])
+
+        for name in sizes:
+            self.assertEqual(os.path.getsize(partitions.partition_path(name)), sizes[name])
+            self.assertEqual(self.line_lengths(name), lines[name])
+        found = list(partitions.iter_rows(['attendance id', 'first name', 'departure date', 'departure time']))
+        self.assertEqual(found, [(str(row[0]), row[2], date, time) for row, (_, date, time) in zip(self.rows,
+                                                                                                   departures)])
+
+    @staticmethod
+    def line_lengths(name):
+        with open(partitions.partition_path(name), 'rb') as file:
+            return [len(line) for line in file]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+This module builds reports in background threads, so the GUI answers user while a long report is read.
+
+A report is a function build(job) which reads its rows through job.rows(): the job counts them, so the GUI can show
+the progress, and stops the report, when user cancels it. The GUI never waits for a job: it asks job.done() from
+time to time (see run_report() in gui.py) and takes job.result() when it's ready.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+class Cancelled(Exception):
+    """
+    The exception is raised in the report, when user has cancelled it.
+    """
+
+
+# Threads which build reports.
+executor = ThreadPoolExecutor(max_workers=config.REPORT_WORKERS, thread_name_prefix='report')
+
+
+class ReportJob:
+    """
+    One report which is built in the background.
+    """
+
+    def __init__(self, build):
+        self.count = 0  # rows read by the report so far
+        self.cancelled = threading.Event()
+        self.future = executor.submit(build, self)
+
+    def rows(self, rows):
+        """
+        The generator yields given rows and counts them. It raises Cancelled, if the job is cancelled.
+        """
+        for row in rows:
+            if self.cancelled.is_set():
+                raise Cancelled()
+            self.count += 1
+            yield row
+
+    def cancel(self):
+        """
+        Method asks the report to stop. A report which hasn't started yet doesn't start at all.
+        """
+        self.cancelled.set()
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        """
+        Method returns the result of the finished report. It raises Cancelled, if the report was cancelled, or the
+        exception raised by the report.
+        """
+        if self.cancelled.is_set():
+            raise Cancelled()
+        return self.future.result()
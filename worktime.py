@@ -0,0 +1,175 @@
+"""
+This module keeps worked time: for every employee and every day the minutes he worked and the number of his
+attendances (sessions) which started on this day.
+
+The table is changed every time an attendance is closed, so we never pair arrivals and departures of the whole
+history to answer how long somebody worked. It can always be counted again from attendance data.
+
+Csv storage keeps the table in worked_time.csv. New sessions are appended to the file, so there may be several rows
+for one employee and day: we sum them when we read the file and write it again, when there are too many of them.
+
+To count the table again or to see worked time of an employee run:
+    python worktime.py rebuild
+    python worktime.py <employee id> [from date] [to date]
+"""
+
+import os
+import csv
+import sys
+import datetime
+
+from csvfile import iter_rows
+from dates import parse_date, read_date, to_user
+from locking import atomic_write
+from metadata import file_stamp
+
+
+WORKED_TIME_FILE = 'worked_time.csv'
+FIELDS = ['employee id', 'date', 'minutes', 'sessions']
+
+# Columns of attendance we need to count worked time.
+ATTENDANCE_COLUMNS = ['employee id', 'arrival date', 'arrival time', 'departure date', 'departure time']
+
+
+def worked_minutes(arrival_date, arrival_time, departure_date, departure_time):
+    """
+    The function returns minutes between arrival and departure (dates 'YYYY-MM-DD', times 'HH:MM').
+    """
+    arrival = datetime.datetime.fromisoformat(arrival_date + ' ' + arrival_time)
+    departure = datetime.datetime.fromisoformat(departure_date + ' ' + departure_time)
+    return max(0, int((departure - arrival).total_seconds()) // 60)
+
+
+def count_worked_time(rows):
+    """
+    The function counts worked time from attendance rows. Open attendances are skipped.
+    :param rows: tuples with values of ATTENDANCE_COLUMNS
+    :return: a list of tuples (employee id, date, minutes, sessions), the date is the day of arrival
+    """
+    table = {}
+    for employee_id, arrival_date, arrival_time, departure_date, departure_time in rows:
+        if departure_date == 'None':
+            continue
+        value = table.setdefault((str(employee_id), arrival_date), [0, 0])
+        value[0] += worked_minutes(arrival_date, arrival_time, departure_date, departure_time)
+        value[1] += 1
+    return [(employee_id, date, minutes, sessions) for (employee_id, date), (minutes, sessions) in table.items()]
+
+
+def days_between(days, start=None, end=None):
+    """
+    The function picks worked time between given dates (datetime.date, both included) from the dictionary
+    {date: (minutes, sessions)} of one employee. For a closed range it looks up every day of it.
+    """
+    if start is not None and end is not None:
+        result = {}
+        for offset in range((end - start).days + 1):
+            day = start + datetime.timedelta(days=offset)
+            if day in days:
+                result[day] = days[day]
+        return result
+    return {day: value for day, value in days.items()
+            if (start is None or day >= start) and (end is None or day <= end)}
+
+
+class WorkedTimeFile:
+    """
+    The table of worked time in a csv file together with its copy in memory:
+    {employee id: {date: (minutes, sessions)}}. If another program changes the file, we read it again.
+    """
+
+    def __init__(self, file_name=WORKED_TIME_FILE):
+        self.file_name = file_name
+        self.table = None
+        self.rows = 0  # rows in the file, there may be more of them than days in the table
+        self.stamp = None  # size and time of the last change of the file, when we read or wrote it
+
+    def load(self):
+        """
+        Method returns the table in memory and reads the file, if it has been changed since we saw it.
+        """
+        if self.table is not None and self.stamp == file_stamp(self.file_name):
+            return self.table
+        self.table, self.rows = {}, 0
+        if os.path.isfile(self.file_name):
+            for employee_id, date, minutes, sessions in iter_rows(self.file_name):
+                self.add_to_table(employee_id, parse_date(date), int(minutes), int(sessions))
+                self.rows += 1
+        self.stamp = file_stamp(self.file_name)
+        return self.table
+
+    def add_to_table(self, employee_id, day, minutes, sessions):
+        days = self.table.setdefault(str(employee_id), {})
+        old_minutes, old_sessions = days.get(day, (0, 0))
+        days[day] = (old_minutes + minutes, old_sessions + sessions)
+
+    def add(self, entries):
+        """
+        Method adds sessions to the table and appends them to the file.
+        :param entries: tuples (employee id, date 'YYYY-MM-DD', minutes, sessions)
+        """
+        table = self.load()
+        is_new = not os.path.isfile(self.file_name)
+        with open(self.file_name, 'a', newline='') as file:
+            writer = csv.writer(file, delimiter=';', dialect='excel')
+            if is_new:
+                writer.writerow(FIELDS)
+            for employee_id, date, minutes, sessions in entries:
+                writer.writerow([employee_id, date, minutes, sessions])
+                self.add_to_table(employee_id, parse_date(date), minutes, sessions)
+                self.rows += 1
+        self.stamp = file_stamp(self.file_name)
+
+        # If the file has become twice as long as the table, we write it again with one row for every day.
+        if self.rows > 2 * sum(len(days) for days in table.values()):
+            self.write()
+
+    def replace(self, entries):
+        """
+        Method puts the given table instead of the old one.
+        :param entries: tuples (employee id, date 'YYYY-MM-DD', minutes, sessions)
+        """
+        self.table = {}
+        for employee_id, date, minutes, sessions in entries:
+            self.add_to_table(employee_id, parse_date(date), minutes, sessions)
+        self.write()
+
+    def write(self):
+        with atomic_write(self.file_name) as file:
+            writer = csv.writer(file, delimiter=';', dialect='excel')
+            writer.writerow(FIELDS)
+            self.rows = 0
+            for employee_id, days in self.table.items():
+                for day, (minutes, sessions) in sorted(days.items()):
+                    writer.writerow([employee_id, day.isoformat(), minutes, sessions])
+                    self.rows += 1
+        self.stamp = file_stamp(self.file_name)
+
+    def read(self, employee_id, start=None, end=None):
+        """
+        Method returns worked time of the employee between given dates: {date: (minutes, sessions)}.
+        """
+        return days_between(self.load().get(str(employee_id), {}), start, end)
+
+
+if __name__ == '__main__':
+    from employee import load_employees, registry
+    from attendance import load_attendance_state, rebuild_worked_time, worked_time
+
+    load_employees()
+    load_attendance_state()
+    if len(sys.argv) == 2 and sys.argv[1] == 'rebuild':
+        print('Worked time is counted for {} days.'.format(rebuild_worked_time()))
+    elif 2 <= len(sys.argv) <= 4 and sys.argv[1].isdigit():
+        dates = [read_date(argument) for argument in sys.argv[2:4]]
+        days = worked_time(sys.argv[1], *dates)
+        for day, (minutes, sessions) in sorted(days.items()):
+            print('{}  {:>2}:{:02d}  {} sessions'.format(to_user(day.isoformat()), minutes // 60, minutes % 60,
+                                                        sessions))
+        total = sum(minutes for minutes, _ in days.values())
+        employee = registry.get(sys.argv[1])
+        name = employee.first_name + ' ' + employee.last_name if employee is not None else sys.argv[1]
+        print('{} worked {}:{:02d} in {} days.'.format(name, total // 60, total % 60, len(days)))
+    else:
+        print('Usage: python worktime.py rebuild\n'
+              '       python worktime.py <employee id> [from date] [to date]')